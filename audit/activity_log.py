@@ -1,27 +1,27 @@
 """Activity logging."""
 
 import logging
-import uuid
 from typing import Dict, Optional, List
-from datetime import datetime
-from database.supabase_client import supabase_manager
 from database.local_cache import local_cache
-from utils.network_monitor import network_monitor
+from utils.fast_uuid import uuid4_str
+from audit.batcher import BatchWriter
 
 logger = logging.getLogger(__name__)
 
 
 class ActivityLog:
     """Manages activity logs."""
-    
+
+    def __init__(self):
+        self._writer = BatchWriter('activity_logs')
+
     def log_activity(self, user_id: str, activity_type: str, description: str,
                     related_entity_type: Optional[str] = None,
                     related_entity_id: Optional[str] = None,
                     metadata: Optional[Dict] = None):
         """Log user activity."""
-        activity_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
-        
+        activity_id = uuid4_str()
+
         activity_entry = {
             'id': activity_id,
             'user_id': user_id,
@@ -30,17 +30,10 @@ class ActivityLog:
             'related_entity_type': related_entity_type,
             'related_entity_id': related_entity_id,
             'metadata': metadata or {},
-            'created_at': now
+            'created_at': None  # stamped once per batch by the writer
         }
         
-        try:
-            if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                supabase_client.table('activity_logs').insert(activity_entry).execute()
-            else:
-                local_cache.insert('activity_logs', activity_entry, mark_pending=True)
-        except Exception as e:
-            logger.error(f"Error logging activity: {e}")
+        self._writer.submit(activity_entry)
     
     def get_activity_log(self, user_id: Optional[str] = None, limit: int = 100) -> List[Dict]:
         """Get activity log entries."""
@@ -1,26 +1,26 @@
 """Complete change history tracking."""
 
 import logging
-import uuid
 from typing import Dict, Optional, List
-from datetime import datetime
-from database.supabase_client import supabase_manager
 from database.local_cache import local_cache
-from utils.network_monitor import network_monitor
+from utils.fast_uuid import uuid4_str
+from audit.batcher import BatchWriter
 
 logger = logging.getLogger(__name__)
 
 
 class AuditTrail:
     """Manages audit trail."""
-    
+
+    def __init__(self):
+        self._writer = BatchWriter('audit_logs', timestamp_field='changed_at')
+
     def log_change(self, table_name: str, record_id: str, operation: str,
                    old_values: Optional[Dict], new_values: Optional[Dict],
                    changed_by: str, ip_address: str = '', user_agent: str = ''):
         """Log a data change."""
-        audit_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
-        
+        audit_id = uuid4_str()
+
         audit_entry = {
             'id': audit_id,
             'table_name': table_name,
@@ -29,19 +29,12 @@ class AuditTrail:
             'old_values': old_values or {},
             'new_values': new_values or {},
             'changed_by': changed_by,
-            'changed_at': now,
+            'changed_at': None,  # stamped once per batch by the writer
             'ip_address': ip_address,
             'user_agent': user_agent
         }
         
-        try:
-            if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                supabase_client.table('audit_logs').insert(audit_entry).execute()
-            else:
-                local_cache.insert('audit_logs', audit_entry, mark_pending=True)
-        except Exception as e:
-            logger.error(f"Error logging audit trail: {e}")
+        self._writer.submit(audit_entry)
     
     def get_audit_log(self, table_name: Optional[str] = None, 
                       record_id: Optional[str] = None, limit: int = 100) -> List[Dict]:
@@ -0,0 +1,176 @@
+"""Background batching for audit/activity log writes."""
+
+import atexit
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List
+from database.supabase_client import supabase_manager
+from database.local_cache import local_cache
+from database.sync_queue import sync_queue
+from utils.network_monitor import network_monitor
+
+logger = logging.getLogger(__name__)
+
+# TTL-cached online check: audit writes tolerate a couple of seconds of
+# staleness, so don't pay for a connectivity probe on every flush.
+_ONLINE_TTL = 2.0
+_last_online_check: tuple = (0.0, False)
+
+
+def _is_online_cached() -> bool:
+    global _last_online_check
+    now = time.monotonic()
+    checked_at, flag = _last_online_check
+    if now - checked_at < _ONLINE_TTL:
+        return flag
+    flag = network_monitor.is_online()
+    _last_online_check = (now, flag)
+    return flag
+
+
+class BatchWriter:
+    """Buffers log entries and flushes them in bulk from a background thread.
+
+    Entries are appended to an in-process queue and written either every
+    `flush_interval` seconds or as soon as `wake_threshold` entries are
+    pending, whichever comes first. A single bulk insert replaces the
+    one-row-per-call round-trip to Supabase (or SQLite when offline).
+
+    All writers share one flusher thread, polling at the shortest
+    `flush_interval` of any registered writer, so audit and activity
+    batches ride the same Supabase session back-to-back instead of each
+    holding a blocked thread per insert.
+    """
+
+    # Shared flusher state: every writer registers here and one daemon
+    # thread drains them all.
+    _writers: List['BatchWriter'] = []
+    _registry_lock = threading.Lock()
+    _shared_wake = threading.Event()
+    _flusher_thread: threading.Thread = None
+
+    def __init__(self, table: str, max_batch: int = 500,
+                 flush_interval: float = 0.5, wake_threshold: int = 100,
+                 max_queued: int = 10000, timestamp_field: str = 'created_at'):
+        self.table = table
+        self.timestamp_field = timestamp_field
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.wake_threshold = wake_threshold
+        self.max_queued = max_queued
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._wake = BatchWriter._shared_wake
+        self._register()
+
+    def _register(self):
+        with BatchWriter._registry_lock:
+            BatchWriter._writers.append(self)
+            if BatchWriter._flusher_thread is None:
+                BatchWriter._flusher_thread = threading.Thread(
+                    target=BatchWriter._run_shared, daemon=True, name="audit-flusher"
+                )
+                BatchWriter._flusher_thread.start()
+                atexit.register(BatchWriter.flush_all)
+
+    @classmethod
+    def _run_shared(cls):
+        while True:
+            # The shared thread honors the tightest interval any writer
+            # asked for; a flush drains every writer anyway
+            with cls._registry_lock:
+                interval = min((w.flush_interval for w in cls._writers), default=0.5)
+            cls._shared_wake.wait(interval)
+            cls._shared_wake.clear()
+            cls.flush_all()
+
+    @classmethod
+    def flush_all(cls):
+        with cls._registry_lock:
+            writers = list(cls._writers)
+        for writer in writers:
+            writer.flush()
+
+    def submit(self, entry: Dict):
+        """Queue an entry for background flushing. Returns immediately.
+
+        The queue is bounded so a long outage can't grow it without
+        limit; overflow entries spill straight to the local cache and
+        are picked up by the normal sync path.
+        """
+        with self._lock:
+            if len(self._queue) >= self.max_queued:
+                spill = True
+            else:
+                spill = False
+                self._queue.append(entry)
+                pending = len(self._queue)
+
+        if spill:
+            try:
+                if not entry.get(self.timestamp_field):
+                    entry[self.timestamp_field] = datetime.now(timezone.utc).isoformat(timespec='microseconds')
+                # Row plus sync-queue entry in one commit, so the
+                # normal sync path really does replay it later
+                local_cache.insert_with_pending(self.table, self._local_row(entry))
+            except Exception as e:
+                logger.error(f"Error spilling {self.table} entry to local cache: {e}")
+            return
+
+        if pending >= self.wake_threshold:
+            self._wake.set()
+
+    def flush(self):
+        """Drain and write all pending entries."""
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            self._write(batch)
+
+    def _drain(self) -> List[Dict]:
+        with self._lock:
+            batch = []
+            while self._queue and len(batch) < self.max_batch:
+                batch.append(self._queue.popleft())
+        return batch
+
+    def _write(self, rows: List[Dict]):
+        # One timestamp per batch; utcnow() is deprecated and entries in
+        # the same flush don't need distinct stamps.
+        now = datetime.now(timezone.utc).isoformat(timespec='microseconds')
+        field = self.timestamp_field
+        for row in rows:
+            if not row.get(field):
+                row[field] = now
+        try:
+            if _is_online_cached():
+                supabase_client = supabase_manager.client
+                supabase_client.table(self.table).insert(rows).execute()
+            else:
+                local_rows = [self._local_row(row) for row in rows]
+                local_cache.insert_many(self.table, local_rows, mark_pending=True)
+                sync_queue.add_operations([
+                    {'table_name': self.table, 'record_id': row['id'],
+                     'operation': 'create', 'local_data': row}
+                    for row in local_rows
+                ])
+        except Exception as e:
+            logger.error(f"Error flushing {len(rows)} entries to {self.table}: {e}")
+
+    @staticmethod
+    def _local_row(entry: Dict) -> Dict:
+        """Copy an entry with structured values flattened for SQLite.
+
+        Supabase takes metadata/old_values/new_values as JSON objects;
+        the local mirror stores them as TEXT like every other table.
+        """
+        return {
+            key: json.dumps(value, separators=(',', ':'))
+            if isinstance(value, (dict, list)) else value
+            for key, value in entry.items()
+        }
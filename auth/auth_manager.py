@@ -1,18 +1,47 @@
 """Authentication manager supporting both SQLite and Supabase."""
 
 import logging
-import uuid
+import secrets
 import bcrypt
 from typing import Optional, Dict, Any
-from datetime import datetime
-from database.local_cache import LocalCache
+from database.local_cache import local_cache
 from database.supabase_client import supabase_manager
 from config.settings import settings
+from utils.fast_uuid import uuid4_str
+from utils.now import iso_now
+from auth.roles import ROLE_PERMISSION_SETS
 
 logger = logging.getLogger(__name__)
 
-# Global cache instance
-local_cache = LocalCache()
+# Permission matrix, hoisted to module scope as frozensets so each check
+# is a single hash lookup instead of rebuilding the dict per call.
+_ROLE_PERMISSIONS: Dict[str, frozenset] = {
+    'admin': frozenset({'all'}),
+    'doctor': frozenset({'view_clients', 'edit_clients', 'view_appointments', 'edit_appointments',
+                         'view_treatment_plans', 'edit_treatment_plans', 'view_medical_records',
+                         'edit_medical_records', 'create_prescriptions', 'view_reports'}),
+    'staff': frozenset({'view_clients', 'view_appointments', 'edit_appointments', 'view_treatment_plans',
+                        'view_medical_records', 'view_reports'}),
+    'receptionist': frozenset({'view_clients', 'edit_clients', 'view_appointments', 'edit_appointments',
+                               'create_appointments', 'view_payments', 'process_payments'})
+}
+
+_EMPTY_PERMISSIONS: frozenset = frozenset()
+
+# SQL constants: passing the same string object to conn.execute lets
+# sqlite3's internal statement cache reuse the compiled statement instead
+# of re-parsing per call.
+SQL_LOGIN_SELECT = """SELECT u.id, u.username, u.email, u.password_hash, u.full_name,
+                          COALESCE(r.role, 'staff')
+                   FROM users u
+                   LEFT JOIN user_roles r ON r.user_id = u.id
+                   WHERE u.username = ? AND u.is_active = 1"""
+SQL_UPDATE_LAST_LOGIN = "UPDATE users SET last_login_at = ? WHERE id = ?"
+SQL_SELECT_USERNAME = "SELECT id FROM users WHERE username = ?"
+SQL_INSERT_USER = """INSERT INTO users (id, username, email, password_hash, full_name, is_active, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
+SQL_INSERT_ROLE = "INSERT INTO user_roles (id, user_id, role, created_at) VALUES (?, ?, ?, ?)"
+SQL_SELECT_ROLE = "SELECT role FROM user_roles WHERE user_id = ?"
 
 
 class AuthManager:
@@ -23,6 +52,9 @@ class AuthManager:
         self.session_token: Optional[str] = None
         self.refresh_token: Optional[str] = None
         self.auth_mode = settings.auth_mode
+        # Permission frozenset for the logged-in user's role, cached at
+        # login so permission checks skip the per-call role lookup.
+        self._current_permissions: Optional[frozenset] = None
     
     def login(self, username: str, password: str) -> tuple[bool, Optional[str]]:
         """Login with username and password."""
@@ -35,34 +67,26 @@ class AuthManager:
         """Login using SQLite database."""
         try:
             conn = local_cache._get_connection()
-            
-            # Find user by username
-            cursor = conn.execute(
-                "SELECT id, username, email, password_hash, full_name FROM users WHERE username = ? AND is_active = 1",
-                (username,)
-            )
+
+            # Find user and role in a single query instead of a separate
+            # get_user_role round-trip
+            cursor = conn.execute(SQL_LOGIN_SELECT, (username,))
             user_row = cursor.fetchone()
-            
+
             if not user_row:
                 logger.warning(f"Login attempt with invalid username: {username}")
                 return False, "Invalid username or password"
-            
-            user_id, db_username, email, password_hash, full_name = user_row
-            
+
+            user_id, db_username, email, password_hash, full_name, role = user_row
+
             # Verify password
             if not bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8')):
                 logger.warning(f"Login attempt with invalid password for user: {username}")
                 return False, "Invalid username or password"
-            
-            # Get user role
-            role = self.get_user_role(user_id)
-            
+
             # Update last login
-            now = datetime.utcnow().isoformat()
-            conn.execute(
-                "UPDATE users SET last_login_at = ? WHERE id = ?",
-                (now, user_id)
-            )
+            now = iso_now()
+            conn.execute(SQL_UPDATE_LAST_LOGIN, (now, user_id))
             conn.commit()
             
             # Set current user
@@ -74,9 +98,11 @@ class AuthManager:
                 'role': role,
                 'created_at': None  # Can be fetched if needed
             }
-            
+            self._current_permissions = ROLE_PERMISSION_SETS.get(role, frozenset())
+            self._invalidate_permission_cache()
+
             # Generate a simple session token (for SQLite mode)
-            self.session_token = f"sqlite_session_{user_id}_{uuid.uuid4().hex[:16]}"
+            self.session_token = f"sqlite_session_{user_id}_{secrets.token_hex(8)}"
             
             logger.info(f"User {username} logged in successfully (SQLite)")
             return True, None
@@ -118,6 +144,8 @@ class AuthManager:
                 
                 role = self.get_user_role(response.user.id)
                 self.current_user['role'] = role
+                self._current_permissions = ROLE_PERMISSION_SETS.get(role, frozenset())
+                self._invalidate_permission_cache()
                 
                 logger.info(f"User {username} ({email}) logged in successfully (Supabase)")
                 return True, None
@@ -138,6 +166,8 @@ class AuthManager:
             self.current_user = None
             self.session_token = None
             self.refresh_token = None
+            self._current_permissions = None
+            self._invalidate_permission_cache()
             
             logger.info("User logged out")
             return True
@@ -146,26 +176,26 @@ class AuthManager:
             logger.error(f"Logout error: {e}")
             return False
     
+    @staticmethod
+    def _invalidate_permission_cache():
+        # Late import: permission_validator imports this module at load
+        from auth.permission_validator import PermissionValidator
+        PermissionValidator.invalidate()
+
     def get_current_user(self) -> Optional[Dict]:
         """Get current logged-in user."""
         return self.current_user
     
     def is_authenticated(self) -> bool:
         """Check if user is authenticated."""
-        if self.auth_mode == 'sqlite':
-            return self.current_user is not None and self.session_token is not None
-        else:
-            return self.current_user is not None and self.session_token is not None
+        return self.current_user is not None and self.session_token is not None
     
     def get_user_role(self, user_id: str) -> Optional[str]:
         """Get user role from database."""
         try:
             if self.auth_mode == 'sqlite':
                 conn = local_cache._get_connection()
-                cursor = conn.execute(
-                    "SELECT role FROM user_roles WHERE user_id = ?",
-                    (user_id,)
-                )
+                cursor = conn.execute(SQL_SELECT_ROLE, (user_id,))
                 row = cursor.fetchone()
                 if row:
                     return row[0]
@@ -191,29 +221,25 @@ class AuthManager:
             conn = local_cache._get_connection()
             
             # Check if username already exists
-            cursor = conn.execute("SELECT id FROM users WHERE username = ?", (username,))
+            cursor = conn.execute(SQL_SELECT_USERNAME, (username,))
             if cursor.fetchone():
                 return False, None, "Username already exists"
             
             # Hash password
-            password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            password_hash = bcrypt.hashpw(
+                password.encode('utf-8'),
+                bcrypt.gensalt(rounds=settings.bcrypt_rounds)
+            ).decode('utf-8')
             
             # Create user
-            user_id = str(uuid.uuid4())
-            now = datetime.utcnow().isoformat()
-            
-            conn.execute(
-                """INSERT INTO users (id, username, email, password_hash, full_name, is_active, created_at, updated_at)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                (user_id, username, email, password_hash, full_name, 1, now, now)
-            )
+            user_id = uuid4_str()
+            now = iso_now()
             
+            conn.execute(SQL_INSERT_USER, (user_id, username, email, password_hash, full_name, 1, now, now))
+
             # Assign role
-            role_id = str(uuid.uuid4())
-            conn.execute(
-                "INSERT INTO user_roles (id, user_id, role, created_at) VALUES (?, ?, ?, ?)",
-                (role_id, user_id, role, now)
-            )
+            role_id = uuid4_str()
+            conn.execute(SQL_INSERT_ROLE, (role_id, user_id, role, now))
             
             conn.commit()
             
@@ -251,25 +277,20 @@ class AuthManager:
         """Check if current user has a specific permission."""
         if not self.current_user:
             return False
-        
+
         role = self.current_user.get('role', 'staff')
         return self._check_role_permission(role, permission)
+
+    def get_cached_permissions(self) -> Optional[frozenset]:
+        """Get the permission set cached at login, if any."""
+        return self._current_permissions
     
     def _check_role_permission(self, role: str, permission: str) -> bool:
         """Check if role has permission."""
-        # Permission matrix
-        permissions = {
-            'admin': ['all'],
-            'doctor': ['view_clients', 'edit_clients', 'view_appointments', 'edit_appointments',
-                      'view_treatment_plans', 'edit_treatment_plans', 'view_medical_records',
-                      'edit_medical_records', 'create_prescriptions', 'view_reports'],
-            'staff': ['view_clients', 'view_appointments', 'edit_appointments', 'view_treatment_plans',
-                     'view_medical_records', 'view_reports'],
-            'receptionist': ['view_clients', 'edit_clients', 'view_appointments', 'edit_appointments',
-                           'create_appointments', 'view_payments', 'process_payments']
-        }
-        
-        role_perms = permissions.get(role, [])
+        # Admin is the common case for clinic-owner operations
+        if role == 'admin':
+            return True
+        role_perms = _ROLE_PERMISSIONS.get(role, _EMPTY_PERMISSIONS)
         return 'all' in role_perms or permission in role_perms
     
     def _get_email_from_username(self, username: str) -> Optional[str]:
@@ -1,35 +1,62 @@
 """Server-side permission validation."""
 
+import functools
 import logging
+import time
 from typing import Optional
 from auth.auth_manager import auth_manager
 from auth.roles import Permission, has_permission
 
 logger = logging.getLogger(__name__)
 
+# Memoized answers expire after this many seconds even without an
+# explicit invalidate(), so a role changed out-of-band (e.g. by an
+# admin on another machine) can't stay authorized indefinitely
+_TTL_SECONDS = 60
+
+
+@functools.lru_cache(maxsize=256)
+def _validate_cached(user_id: str, permission: str, _epoch: int = 0) -> bool:
+    """Resolve a permission for a user; memoized per (user, permission).
+
+    Cleared on login/logout via PermissionValidator.invalidate(); the
+    _epoch argument rolls over every _TTL_SECONDS, which retires stale
+    entries by changing the cache key rather than by tracking ages.
+    """
+    perms = auth_manager.get_cached_permissions()
+    if perms is not None:
+        return 'all' in perms or permission in perms
+
+    user = auth_manager.get_current_user()
+    role = user.get('role', 'staff') if user else 'staff'
+    return has_permission(role, permission)
+
 
 class PermissionValidator:
     """Validates permissions for operations."""
-    
+
     @staticmethod
     def validate(permission: str, user_id: Optional[str] = None) -> bool:
         """Validate that current user has permission."""
         if not auth_manager.is_authenticated():
             logger.warning("Permission check failed: User not authenticated")
             return False
-        
+
         user = auth_manager.get_current_user()
         if not user:
             return False
-        
-        role = user.get('role', 'staff')
-        
-        # Check permission
-        if not has_permission(role, permission):
-            logger.warning(f"Permission denied: {role} does not have {permission}")
-            return False
-        
-        return True
+
+        if _validate_cached(user.get('id', ''), permission,
+                            int(time.monotonic() / _TTL_SECONDS)):
+            return True
+
+        logger.warning(f"Permission denied: {user.get('role', 'staff')} does not have {permission}")
+        return False
+
+    @staticmethod
+    def invalidate():
+        """Drop memoized results; call whenever the session changes."""
+        _validate_cached.cache_clear()
     
     @staticmethod
     def validate_user_access(user_id: str, resource_user_id: Optional[str] = None) -> bool:
@@ -52,9 +79,14 @@ class PermissionValidator:
     def require_permission(permission: str):
         """Decorator to require permission for a function."""
         def decorator(func):
+            # Precomputed at decoration time so the per-call path is one
+            # validate plus the raise, with no f-string or attribute lookup
+            error_message = f"Permission required: {permission}"
+            validate = PermissionValidator.validate
+
             def wrapper(*args, **kwargs):
-                if not PermissionValidator.validate(permission):
-                    raise PermissionError(f"Permission required: {permission}")
+                if not validate(permission):
+                    raise PermissionError(error_message)
                 return func(*args, **kwargs)
             return wrapper
         return decorator
@@ -106,10 +106,18 @@ ROLE_PERMISSIONS: Dict[str, List[str]] = {
 }
 
 
+# Reverse index built once at import so permission checks are a single
+# hash lookup instead of a linear scan of the role's permission list.
+ROLE_PERMISSION_SETS: Dict[str, frozenset] = {
+    role: frozenset(permissions) for role, permissions in ROLE_PERMISSIONS.items()
+}
+
+_EMPTY: frozenset = frozenset()
+
+
 def has_permission(role: str, permission: str) -> bool:
     """Check if a role has a specific permission."""
-    permissions = ROLE_PERMISSIONS.get(role, [])
-    return permission in permissions
+    return permission in ROLE_PERMISSION_SETS.get(role, _EMPTY)
 
 
 def get_role_permissions(role: str) -> List[str]:
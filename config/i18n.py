@@ -8,24 +8,60 @@ import pytz
 from config.settings import settings
 
 
+def _flatten(data: Dict, prefix: str = '') -> Dict[str, str]:
+    """Flatten nested translation dicts into dot-notation keys.
+
+    {"auth": {"login": "Sign in"}} becomes {"auth.login": "Sign in"},
+    so lookups are a single dict.get instead of a per-call path walk.
+    """
+    flat: Dict[str, str] = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{path}."))
+        elif isinstance(value, str):
+            flat[path] = value
+    return flat
+
+
 class Translator:
     """Translation manager for multi-language support."""
-    
+
+    # Parsed translation files shared across instances and language
+    # switches, so each file is read and parsed from disk at most once.
+    _CACHE: Dict[str, Dict] = {}
+
+    # Default date formats, hoisted so format_date doesn't rebuild the
+    # dict on every call
+    _DATE_FORMATS: Dict[str, str] = {
+        "short": "%m/%d/%Y",
+        "medium": "%B %d, %Y",
+        "long": "%A, %B %d, %Y",
+        "time": "%I:%M %p",
+        "datetime": "%m/%d/%Y %I:%M %p"
+    }
+
     def __init__(self, language: Optional[str] = None):
         self.language = language or settings.default_language
         self.translations: Dict[str, Dict[str, str]] = {}
         self.translations_dir = Path(__file__).parent.parent / "translations"
         self.translations_dir.mkdir(exist_ok=True)
-        self._load_translations()
-    
+        # Loading is deferred until the first translate() call so apps
+        # that never use i18n skip the JSON parse at startup.
+
     def _load_translations(self):
         """Load translation files."""
+        cached = Translator._CACHE.get(self.language)
+        if cached is not None:
+            self.translations[self.language] = cached
+            return
+
         translation_file = self.translations_dir / f"{self.language}.json"
-        
+
         if translation_file.exists():
             try:
                 with open(translation_file, 'r', encoding='utf-8') as f:
-                    self.translations[self.language] = json.load(f)
+                    self.translations[self.language] = _flatten(json.load(f))
             except Exception as e:
                 print(f"Error loading translations: {e}")
                 self.translations[self.language] = {}
@@ -35,38 +71,30 @@ class Translator:
             if en_file.exists():
                 try:
                     with open(en_file, 'r', encoding='utf-8') as f:
-                        self.translations[self.language] = json.load(f)
+                        self.translations[self.language] = _flatten(json.load(f))
                 except Exception:
                     self.translations[self.language] = {}
             else:
                 self.translations[self.language] = {}
-    
+
+        Translator._CACHE[self.language] = self.translations[self.language]
+
     def translate(self, key: str, default: Optional[str] = None, **kwargs) -> str:
         """Translate a key to the current language.
-        
+
         Supports nested keys with dot notation, e.g., "auth.login" -> translations["auth"]["login"]
         """
-        translations_dict = self.translations.get(self.language, {})
-        
-        # Handle nested keys with dot notation
-        if '.' in key:
-            keys = key.split('.')
-            translation = translations_dict
-            try:
-                for k in keys:
-                    translation = translation[k]
-            except (KeyError, TypeError):
-                translation = default or key
-        else:
-            # Simple key lookup
-            translation = translations_dict.get(key, default or key)
-        
-        # Ensure translation is a string
-        if not isinstance(translation, str):
-            translation = default or key
-        
-        # Replace placeholders if kwargs provided
-        if kwargs:
+        translations_dict = self.translations.get(self.language)
+        if translations_dict is None:
+            self._load_translations()
+            translations_dict = self.translations.get(self.language, {})
+
+        # Flattened at load time, so dotted keys are plain dict lookups
+        translation = translations_dict.get(key, default or key)
+
+        # Replace placeholders if kwargs provided; the substring scan is
+        # cheap C-level work, str.format's parser is not
+        if kwargs and '{' in translation:
             try:
                 translation = translation.format(**kwargs)
             except (KeyError, ValueError):
@@ -81,16 +109,7 @@ class Translator:
     
     def format_date(self, date: datetime, format_type: str = "short") -> str:
         """Format a date according to locale."""
-        # Default formats
-        formats = {
-            "short": "%m/%d/%Y",
-            "medium": "%B %d, %Y",
-            "long": "%A, %B %d, %Y",
-            "time": "%I:%M %p",
-            "datetime": "%m/%d/%Y %I:%M %p"
-        }
-        
-        format_str = formats.get(format_type, formats["short"])
+        format_str = self._DATE_FORMATS.get(format_type, self._DATE_FORMATS["short"])
         return date.strftime(format_str)
     
     def format_currency(self, amount: float, currency: str = "USD") -> str:
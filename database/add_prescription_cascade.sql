@@ -0,0 +1,12 @@
+-- SQL script to cascade prescription deletes to their items
+-- Run this in your Supabase SQL Editor
+
+-- With the cascade in place the app issues a single DELETE on
+-- prescriptions instead of deleting prescription_items first
+ALTER TABLE prescription_items
+    DROP CONSTRAINT IF EXISTS prescription_items_prescription_id_fkey;
+
+ALTER TABLE prescription_items
+    ADD CONSTRAINT prescription_items_prescription_id_fkey
+    FOREIGN KEY (prescription_id) REFERENCES prescriptions(id)
+    ON DELETE CASCADE;
@@ -3,17 +3,30 @@
 import sqlite3
 import json
 import logging
-import uuid
+import threading
 import bcrypt
 from pathlib import Path
 from typing import Any, Optional, List, Dict
-from datetime import datetime
+from datetime import datetime, timezone
+from collections import OrderedDict
 from contextlib import contextmanager
 from config.settings import settings
+from utils.fast_uuid import uuid4_str
 
 logger = logging.getLogger(__name__)
 
 
+def _utcnow_iso() -> str:
+    """Current UTC time as an ISO-8601 string.
+
+    datetime.now(timezone.utc) is measurably faster than the deprecated
+    utcnow(), and millisecond precision is plenty for row timestamps.
+    The offset suffix also makes the strings parse as aware datetimes,
+    matching what the server sends back.
+    """
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+
+
 class LocalCache:
     """Manages local SQLite cache with WAL mode and transactions."""
     
@@ -21,33 +34,130 @@ class LocalCache:
         self.db_path = Path(db_path or settings.local_cache_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._connection: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.RLock()
+        self._readers = threading.local()
+        self._commit_count = 0
+        self._txn_depth = 0
+        # SQL text cache keyed by (op, table, column tuple) so repeated
+        # inserts/updates with the same shape skip string building and
+        # hit sqlite3's prepared-statement cache with identical text
+        self._sql_cache: Dict[tuple, str] = {}
+        # Read-through LRU over get(): hot rows skip the SQLite round
+        # trip entirely. Writers evict through _invalidate_row.
+        self._row_cache: 'OrderedDict[tuple, Dict[str, Any]]' = OrderedDict()
+        self._row_cache_lock = threading.Lock()
+        # Identifier whitelist built from the schema after init; query()
+        # checks table/column names against it instead of trusting
+        # caller strings spliced into SQL
+        self._valid_tables: set = set()
+        self._valid_cols: Dict[str, set] = {}
         self._initialize_database()
+
+    # Snapshots above this size go to original_data_store instead of
+    # inline in the row (SQLite stores TEXT in the B-tree leaf, so big
+    # inline payloads bloat every scan of the table)
+    _LARGE_PAYLOAD_BYTES = 512
     
+    # Note on the driver choice: an apsw backend was evaluated for its
+    # native statement cache and broader GIL release, but the class
+    # leans on sqlite3 semantics throughout (Row mapping access,
+    # driver-level commit/rollback, cached_statements) and apsw pins
+    # its own bundled SQLite. The prepared-statement win is already
+    # covered by _sql_cache emitting byte-identical SQL into
+    # cached_statements=256 below.
     def _get_connection(self) -> sqlite3.Connection:
         """Get database connection with WAL mode."""
         if self._connection is None:
             self._connection = sqlite3.connect(
                 str(self.db_path),
                 check_same_thread=False,
-                timeout=30.0
+                timeout=30.0,
+                cached_statements=256
             )
-            self._connection.execute("PRAGMA journal_mode=WAL")
+            # Tune for the write-heavy offline workload. WAL needs a real
+            # file; leave in-memory databases on the default journal mode.
+            if str(self.db_path) != ':memory:':
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                self._connection.execute("PRAGMA synchronous=NORMAL")
+                self._connection.execute("PRAGMA temp_store=MEMORY")
+                self._connection.execute("PRAGMA cache_size=-65536")
+                self._connection.execute("PRAGMA mmap_size=268435456")
+                self._connection.execute("PRAGMA busy_timeout=30000")
+                self._connection.execute("PRAGMA wal_autocheckpoint=1000")
             self._connection.execute("PRAGMA foreign_keys=ON")
+            # REPLACE's implicit delete must fire the clients_fts delete
+            # trigger (recursive_triggers is OFF by default), or the
+            # external-content index keeps a stale entry for the old row
+            self._connection.execute("PRAGMA recursive_triggers=ON")
             self._connection.row_factory = sqlite3.Row
         return self._connection
-    
+
+    def _get_reader(self) -> sqlite3.Connection:
+        """Get a read-only connection for the calling thread.
+
+        WAL mode allows readers to run concurrently with the single
+        writer, so reads don't queue behind sync batches. In-memory
+        databases share the writer connection (a second connection would
+        see a different database).
+        """
+        if str(self.db_path) == ':memory:':
+            return self._get_connection()
+
+        reader = getattr(self._readers, 'conn', None)
+        if reader is None:
+            reader = sqlite3.connect(
+                str(self.db_path),
+                timeout=30.0,
+                cached_statements=256
+            )
+            reader.execute("PRAGMA query_only=1")
+            # mmap_size and temp_store are per-connection, so readers
+            # need them too: mmap for zero-copy page access, memory
+            # temp store for ORDER BY spills
+            reader.execute("PRAGMA mmap_size=268435456")
+            reader.execute("PRAGMA temp_store=MEMORY")
+            reader.row_factory = sqlite3.Row
+            self._readers.conn = reader
+        return reader
+
     @contextmanager
     def transaction(self):
-        """Context manager for database transactions."""
-        conn = self._get_connection()
-        try:
-            conn.execute("BEGIN")
-            yield conn
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            logger.error(f"Transaction failed: {e}")
-            raise
+        """Context manager for database transactions.
+
+        Writes are serialized on the single writer connection; readers
+        go through _get_reader and are unaffected.
+
+        Re-entrant: a transaction() block opened inside another joins
+        the outer transaction and commits (or rolls back) with it, so a
+        manager can fuse a row write and its queue entries into one
+        commit - one fsync - by wrapping the existing calls.
+        """
+        with self._write_lock:
+            conn = self._get_connection()
+            if self._txn_depth:
+                self._txn_depth += 1
+                try:
+                    yield conn
+                finally:
+                    self._txn_depth -= 1
+                return
+
+            self._txn_depth = 1
+            try:
+                conn.execute("BEGIN")
+                yield conn
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Transaction failed: {e}")
+                raise
+            else:
+                # Let SQLite refresh planner statistics periodically
+                self._commit_count += 1
+                if self._commit_count % 1000 == 0:
+                    conn.execute("PRAGMA optimize")
+            finally:
+                self._txn_depth = 0
     
     def _initialize_database(self):
         """Initialize database schema."""
@@ -169,6 +279,74 @@ class LocalCache:
                 original_data TEXT,
                 last_synced_at TEXT
             )""",
+            """CREATE TABLE IF NOT EXISTS invoices (
+                id TEXT PRIMARY KEY,
+                invoice_number TEXT,
+                client_id TEXT,
+                reservation_id TEXT,
+                treatment_plan_id TEXT,
+                issue_date TEXT,
+                due_date TEXT,
+                subtotal REAL,
+                tax_rate REAL,
+                tax REAL,
+                discount REAL,
+                total REAL,
+                status TEXT,
+                notes TEXT,
+                created_by TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                pending_sync INTEGER DEFAULT 0,
+                sync_status TEXT DEFAULT 'synced',
+                original_data TEXT,
+                last_synced_at TEXT
+            )""",
+            """CREATE TABLE IF NOT EXISTS invoice_items (
+                id TEXT PRIMARY KEY,
+                invoice_id TEXT,
+                description TEXT,
+                procedure_id TEXT,
+                quantity INTEGER,
+                unit_price REAL,
+                total REAL,
+                created_at TEXT,
+                updated_at TEXT,
+                pending_sync INTEGER DEFAULT 0,
+                sync_status TEXT DEFAULT 'synced',
+                original_data TEXT,
+                last_synced_at TEXT
+            )""",
+            """CREATE TABLE IF NOT EXISTS activity_logs (
+                id TEXT PRIMARY KEY,
+                user_id TEXT,
+                activity_type TEXT,
+                description TEXT,
+                related_entity_type TEXT,
+                related_entity_id TEXT,
+                metadata TEXT,
+                created_at TEXT,
+                pending_sync INTEGER DEFAULT 0,
+                sync_status TEXT DEFAULT 'synced',
+                original_data TEXT,
+                last_synced_at TEXT
+            )""",
+            """CREATE TABLE IF NOT EXISTS audit_logs (
+                id TEXT PRIMARY KEY,
+                table_name TEXT,
+                record_id TEXT,
+                operation TEXT,
+                old_values TEXT,
+                new_values TEXT,
+                changed_by TEXT,
+                changed_at TEXT,
+                ip_address TEXT,
+                user_agent TEXT,
+                pending_sync INTEGER DEFAULT 0,
+                sync_status TEXT DEFAULT 'synced',
+                original_data TEXT,
+                last_synced_at TEXT
+            )""",
             """CREATE TABLE IF NOT EXISTS sync_queue (
                 id TEXT PRIMARY KEY,
                 table_name TEXT,
@@ -191,6 +369,12 @@ class LocalCache:
                 updated_at TEXT,
                 last_login_at TEXT
             )""",
+            """CREATE TABLE IF NOT EXISTS original_data_store (
+                table_name TEXT NOT NULL,
+                record_id TEXT NOT NULL,
+                payload TEXT,
+                PRIMARY KEY (table_name, record_id)
+            )""",
             """CREATE TABLE IF NOT EXISTS user_roles (
                 id TEXT PRIMARY KEY,
                 user_id TEXT NOT NULL,
@@ -201,27 +385,130 @@ class LocalCache:
             )"""
         ]
         
+        # Hot-path indexes. The pending_sync ones are partial: synced
+        # rows (the vast majority) get no index entry, so the index
+        # stays tiny while pending lookups skip the table scan.
+        indexes = [
+            "CREATE INDEX IF NOT EXISTS idx_syncq_pending ON sync_queue(table_name, created_at) WHERE status = 'pending'",
+            "CREATE INDEX IF NOT EXISTS idx_syncq_conflict ON sync_queue(created_at) WHERE status = 'conflict'",
+            # Conflict target for coalescing repeated pending updates to
+            # the same record into one queue entry
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_syncq_coalesce ON sync_queue(table_name, record_id, operation) WHERE status = 'pending' AND operation = 'update'",
+            "CREATE INDEX IF NOT EXISTS idx_clients_pending ON clients(pending_sync) WHERE pending_sync = 1",
+            "CREATE INDEX IF NOT EXISTS idx_doctors_pending ON doctors(pending_sync) WHERE pending_sync = 1",
+            "CREATE INDEX IF NOT EXISTS idx_payments_pending ON payments(pending_sync) WHERE pending_sync = 1",
+            "CREATE INDEX IF NOT EXISTS idx_reservations_pending ON reservations(pending_sync) WHERE pending_sync = 1",
+            "CREATE INDEX IF NOT EXISTS idx_reservations_date ON reservations(reservation_date, doctor_id)",
+            "CREATE INDEX IF NOT EXISTS idx_invoice_items_invoice ON invoice_items(invoice_id)",
+            # Covers the outstanding-balance SUM as an index-only scan
+            "CREATE INDEX IF NOT EXISTS idx_inv_outstanding ON invoices(client_id, total) WHERE status IN ('pending', 'overdue')",
+            # Point lookup for the duplicate-payment check
+            "CREATE INDEX IF NOT EXISTS idx_payments_dup ON payments(reservation_id, amount, payment_date_utc)",
+            # Range seeks for the availability overlap check
+            "CREATE INDEX IF NOT EXISTS idx_res_doctor_time ON reservations(doctor_id, start_time_utc, end_time_utc)",
+            "CREATE INDEX IF NOT EXISTS idx_res_room_time ON reservations(room_id, start_time_utc, end_time_utc)",
+            # Log viewers filter on these
+            "CREATE INDEX IF NOT EXISTS idx_activity_user ON activity_logs(user_id)",
+            "CREATE INDEX IF NOT EXISTS idx_audit_record ON audit_logs(table_name, record_id)",
+        ]
+
         with self.transaction() as conn:
+            # FK checks at commit only; DDL order shouldn't matter
+            conn.execute("PRAGMA defer_foreign_keys=ON")
             for table_sql in tables:
                 conn.execute(table_sql)
-        
+            for index_sql in indexes:
+                conn.execute(index_sql)
+            # Databases created before tax_rate was mirrored locally
+            # need the column added in place - CREATE TABLE IF NOT
+            # EXISTS never extends an existing table
+            invoice_cols = {row[1] for row in conn.execute("PRAGMA table_info(invoices)")}
+            if 'tax_rate' not in invoice_cols:
+                conn.execute("ALTER TABLE invoices ADD COLUMN tax_rate REAL DEFAULT 0")
+
+        # Full-text index over client contact fields; search_clients
+        # falls back to LIKE scans when the SQLite build lacks FTS5
+        self._fts_enabled = False
+        try:
+            conn = self._get_connection()
+            had_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='clients_fts'"
+            ).fetchone() is not None
+            fts_cols = "first_name, last_name, email, phone"
+            new_vals = "new.rowid, new.first_name, new.last_name, new.email, new.phone"
+            old_vals = "old.rowid, old.first_name, old.last_name, old.email, old.phone"
+            with self.transaction() as conn:
+                conn.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5"
+                    f"({fts_cols}, content='clients', content_rowid='rowid')"
+                )
+                conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS clients_fts_ai AFTER INSERT ON clients BEGIN "
+                    f"INSERT INTO clients_fts(rowid, {fts_cols}) VALUES ({new_vals}); END"
+                )
+                conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS clients_fts_ad AFTER DELETE ON clients BEGIN "
+                    f"INSERT INTO clients_fts(clients_fts, rowid, {fts_cols}) VALUES ('delete', {old_vals}); END"
+                )
+                conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS clients_fts_au AFTER UPDATE ON clients BEGIN "
+                    f"INSERT INTO clients_fts(clients_fts, rowid, {fts_cols}) VALUES ('delete', {old_vals}); "
+                    f"INSERT INTO clients_fts(rowid, {fts_cols}) VALUES ({new_vals}); END"
+                )
+                if not had_fts:
+                    # Index rows that predate the virtual table
+                    conn.execute("INSERT INTO clients_fts(clients_fts) VALUES('rebuild')")
+            if had_fts:
+                # Databases written before recursive_triggers was turned
+                # on can hold stale entries: REPLACE's implicit delete
+                # never fired the delete trigger. Verify the index
+                # against the table once per start and rebuild on any
+                # mismatch (or on an SQLite too old to verify).
+                try:
+                    conn.execute(
+                        "INSERT INTO clients_fts(clients_fts, rank) VALUES('integrity-check', 1)"
+                    )
+                    # The probe is an INSERT as far as the driver is
+                    # concerned; close its implicit transaction
+                    conn.commit()
+                except sqlite3.DatabaseError:
+                    logger.warning("clients_fts out of sync with clients; rebuilding")
+                    # The failed check leaves its implicit transaction
+                    # open; clear it before rewriting the index
+                    conn.rollback()
+                    conn.execute("INSERT INTO clients_fts(clients_fts) VALUES('rebuild')")
+                    conn.commit()
+            self._fts_enabled = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 unavailable, client search falls back to LIKE: {e}")
+
+        # Snapshot valid identifiers for query() validation
+        conn = self._get_connection()
+        self._valid_tables = {
+            row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        }
+        for table in self._valid_tables:
+            self._valid_cols[table] = {
+                row[1] for row in conn.execute(f"PRAGMA table_info({table})")
+            }
+
         # Create default admin user if no users exist
         self._create_default_admin()
-        
+
         logger.info("Local cache database initialized")
     
     def _create_default_admin(self):
         """Create default admin user if no users exist."""
         try:
             conn = self._get_connection()
-            
-            # Check if any users exist
-            cursor = conn.execute("SELECT COUNT(*) FROM users")
-            user_count = cursor.fetchone()[0]
-            
-            if user_count == 0:
+
+            # Existence check only - COUNT(*) scans the whole table
+            cursor = conn.execute("SELECT 1 FROM users LIMIT 1")
+            has_users = cursor.fetchone() is not None
+
+            if not has_users:
                 # Create default admin user
-                admin_id = str(uuid.uuid4())
+                admin_id = uuid4_str()
                 admin_username = "admin"
                 admin_password = "admin"  # Default password - CHANGE IN PRODUCTION!
                 admin_email = "admin@clinic.local"
@@ -229,10 +516,10 @@ class LocalCache:
                 # Hash password
                 password_hash = bcrypt.hashpw(
                     admin_password.encode('utf-8'),
-                    bcrypt.gensalt()
+                    bcrypt.gensalt(rounds=settings.bcrypt_rounds)
                 ).decode('utf-8')
                 
-                now = datetime.utcnow().isoformat()
+                now = _utcnow_iso()
                 
                 # Insert admin user
                 conn.execute(
@@ -242,132 +529,597 @@ class LocalCache:
                 )
                 
                 # Assign admin role
-                role_id = str(uuid.uuid4())
+                role_id = uuid4_str()
                 conn.execute(
                     "INSERT INTO user_roles (id, user_id, role, created_at) VALUES (?, ?, ?, ?)",
                     (role_id, admin_id, 'admin', now)
                 )
                 
                 conn.commit()
-                logger.info("Default admin user created: username='admin', password='admin'")
-                print("\n" + "=" * 60)
-                print("DEFAULT ADMIN USER CREATED")
-                print("=" * 60)
-                print("Username: admin")
-                print("Password: admin")
-                print("⚠️  WARNING: Change this password in production!")
-                print("=" * 60 + "\n")
+                logger.warning(
+                    "Default admin user created (username='admin', password='admin') "
+                    "- change this password in production!"
+                )
         
         except Exception as e:
             logger.error(f"Error creating default admin user: {e}")
             # Don't raise - allow app to continue even if admin creation fails
     
-    def insert(self, table: str, data: Dict[str, Any], mark_pending: bool = True) -> str:
-        """Insert a record into local cache."""
-        record_id = data.get('id', str(uuid.uuid4()))
-        now = datetime.utcnow().isoformat()
+    def insert(self, table: str, data: Dict[str, Any], mark_pending: bool = True,
+               replace: bool = True) -> str:
+        """Insert a record into local cache.
+
+        Pass replace=False when the id is known to be fresh (e.g. sync
+        queue entries); plain INSERT skips the conflict-resolution pass
+        OR REPLACE runs against every unique index.
+        """
+        record_id = data.get('id', uuid4_str())
+        now = _utcnow_iso()
         
         data['id'] = record_id
-        data['created_at'] = data.get('created_at', now)
-        data['updated_at'] = data.get('updated_at', now)
-        
+        # sync_queue has no updated_at and audit_logs no created_at;
+        # only stamp tables that carry the column
+        cols = self._valid_cols.get(table)
+        if cols is None or 'created_at' in cols:
+            data['created_at'] = data.get('created_at', now)
+        if cols is None or 'updated_at' in cols:
+            data['updated_at'] = data.get('updated_at', now)
+
         if mark_pending:
+            # No original_data snapshot here: a freshly inserted row has
+            # no prior version to roll back to, and serializing the whole
+            # row doubled the size of every pending record
             data['pending_sync'] = 1
             data['sync_status'] = 'pending'
-            data['original_data'] = json.dumps(data)
-        
-        columns = ', '.join(data.keys())
-        placeholders = ', '.join(['?' for _ in data])
+
+        sql = self._insert_sql(table, tuple(data), replace)
         values = list(data.values())
-        
-        sql = f"INSERT OR REPLACE INTO {table} ({columns}) VALUES ({placeholders})"
-        
+
         with self.transaction() as conn:
             conn.execute(sql, values)
-        
+
+        self._invalidate_row(table, record_id)
         return record_id
+
+    def insert_with_pending(self, table: str, data: Dict[str, Any], operation: str = 'create') -> str:
+        """Insert a row and its sync-queue entry in one commit.
+
+        The offline managers' insert-then-add_operation pair paid two
+        transactions (and two fsyncs) per mutation; fusing both writes
+        into one commit halves that, and either both land or neither.
+        """
+        record_id = data.get('id', uuid4_str())
+        now = _utcnow_iso()
+
+        data['id'] = record_id
+        cols = self._valid_cols.get(table)
+        if cols is None or 'created_at' in cols:
+            data['created_at'] = data.get('created_at', now)
+        if cols is None or 'updated_at' in cols:
+            data['updated_at'] = data.get('updated_at', now)
+        data['pending_sync'] = 1
+        data['sync_status'] = 'pending'
+
+        queue_row = {
+            'id': uuid4_str(),
+            'table_name': table,
+            'record_id': record_id,
+            'operation': operation,
+            'local_data': json.dumps(data, separators=(',', ':')),
+            'remote_data': None,
+            'status': 'pending',
+            'created_at': now
+        }
+
+        with self.transaction() as conn:
+            conn.execute(self._insert_sql(table, tuple(data)), list(data.values()))
+            conn.execute(self._insert_sql('sync_queue', tuple(queue_row), replace=False),
+                         list(queue_row.values()))
+
+        self._invalidate_row(table, record_id)
+        return record_id
+
+    def _insert_sql(self, table: str, columns: tuple, replace: bool = True) -> str:
+        """Build (or fetch cached) INSERT SQL for a column set."""
+        key = ('insert' if replace else 'insert_new', table, columns)
+        sql = self._sql_cache.get(key)
+        if sql is None:
+            verb = "INSERT OR REPLACE" if replace else "INSERT"
+            sql = (
+                f"{verb} INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})"
+            )
+            self._sql_cache[key] = sql
+        return sql
+
+    def insert_many(self, table: str, rows: List[Dict[str, Any]], mark_pending: bool = False) -> int:
+        """Insert many records in one transaction.
+
+        Rows are grouped by column set so each group runs as a single
+        executemany; meant for sync replays and imports where the
+        one-commit-per-row cost of insert() dominates.
+        """
+        if not rows:
+            return 0
+
+        now = _utcnow_iso()
+        cols = self._valid_cols.get(table)
+        stamp_created = cols is None or 'created_at' in cols
+        stamp_updated = cols is None or 'updated_at' in cols
+        groups: Dict[tuple, List[tuple]] = {}
+        for data in rows:
+            data['id'] = data.get('id', uuid4_str())
+            if stamp_created:
+                data['created_at'] = data.get('created_at', now)
+            if stamp_updated:
+                data['updated_at'] = data.get('updated_at', now)
+            if mark_pending:
+                data['pending_sync'] = 1
+                data['sync_status'] = 'pending'
+            groups.setdefault(tuple(data), []).append(tuple(data.values()))
+
+        with self.transaction() as conn:
+            # Batches may carry children before parents; check FKs once
+            # at commit instead of probing the parent index per row
+            conn.execute("PRAGMA defer_foreign_keys=ON")
+            for columns, values in groups.items():
+                conn.executemany(self._insert_sql(table, columns), values)
+
+        for row in rows:
+            self._invalidate_row(table, row.get('id'))
+        return len(rows)
+
+    def bulk_apply(self, table: str, rows: List[Dict[str, Any]]) -> int:
+        """Replay server rows into the cache as fast as SQLite allows.
+
+        For pull-down sync: rows go in exactly as given (no pending
+        markers, no timestamp stamping) through one executemany inside a
+        single BEGIN IMMEDIATE transaction, with foreign key checks
+        deferred to commit so parent/child ordering doesn't matter.
+        """
+        if not rows:
+            return 0
+
+        columns = tuple(rows[0])
+        sql = self._insert_sql(table, columns)
+        params = [tuple(row.get(col) for col in columns) for row in rows]
+
+        with self._write_lock:
+            conn = self._get_connection()
+            try:
+                conn.execute("PRAGMA defer_foreign_keys=ON")
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(sql, params)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Bulk apply failed for {table}: {e}")
+                raise
+
+        for row in rows:
+            self._invalidate_row(table, row.get('id'))
+        return len(rows)
     
     def update(self, table: str, record_id: str, data: Dict[str, Any], mark_pending: bool = True) -> bool:
         """Update a record in local cache."""
         # Get original data before update
         original = self.get(table, record_id)
-        
-        data['updated_at'] = datetime.utcnow().isoformat()
-        
+
+        cols = self._valid_cols.get(table)
+        if cols is None or 'updated_at' in cols:
+            data['updated_at'] = _utcnow_iso()
+
+        side_payload = None
         if mark_pending and original:
-            data['original_data'] = json.dumps(original)
+            payload = json.dumps(original, separators=(',', ':'))
+            if len(payload) > self._LARGE_PAYLOAD_BYTES:
+                # Keep multi-KB snapshots out of the row so table scans
+                # don't drag them through the page cache; get_original_data
+                # fetches them from the side table when actually needed
+                side_payload = payload
+                data['original_data'] = None
+            else:
+                data['original_data'] = payload
             data['pending_sync'] = 1
             data['sync_status'] = 'pending'
-        
-        set_clause = ', '.join([f"{k} = ?" for k in data.keys()])
+
+        columns = tuple(data)
+        key = ('update', table, columns)
+        sql = self._sql_cache.get(key)
+        if sql is None:
+            set_clause = ', '.join([f"{k} = ?" for k in columns])
+            sql = f"UPDATE {table} SET {set_clause} WHERE id = ?"
+            self._sql_cache[key] = sql
         values = list(data.values()) + [record_id]
-        
-        sql = f"UPDATE {table} SET {set_clause} WHERE id = ?"
-        
+
         with self.transaction() as conn:
             cursor = conn.execute(sql, values)
-            return cursor.rowcount > 0
-    
+            if side_payload is not None and cursor.rowcount > 0:
+                conn.execute(
+                    "INSERT OR REPLACE INTO original_data_store (table_name, record_id, payload) VALUES (?, ?, ?)",
+                    (table, record_id, side_payload)
+                )
+            updated = cursor.rowcount > 0
+
+        self._invalidate_row(table, record_id)
+        return updated
+
+    # UPDATE ... RETURNING needs SQLite 3.35 (2021-03)
+    _HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+    def update_returning(self, table: str, record_id: str, data: Dict[str, Any],
+                         mark_pending: bool = True) -> Optional[Dict[str, Any]]:
+        """Update a record and return the post-update row.
+
+        UPDATE ... RETURNING * hands the merged row back from the same
+        statement, so offline managers can queue it without their own
+        SELECT plus Python dict merge. Returns None when the id does
+        not exist.
+        """
+        if not self._HAS_RETURNING:
+            if self.update(table, record_id, data, mark_pending):
+                return self.get(table, record_id)
+            return None
+
+        original = self.get(table, record_id) if mark_pending else None
+
+        cols = self._valid_cols.get(table)
+        if cols is None or 'updated_at' in cols:
+            data['updated_at'] = _utcnow_iso()
+
+        side_payload = None
+        if mark_pending and original:
+            payload = json.dumps(original, separators=(',', ':'))
+            if len(payload) > self._LARGE_PAYLOAD_BYTES:
+                side_payload = payload
+                data['original_data'] = None
+            else:
+                data['original_data'] = payload
+            data['pending_sync'] = 1
+            data['sync_status'] = 'pending'
+
+        columns = tuple(data)
+        key = ('update_ret', table, columns)
+        sql = self._sql_cache.get(key)
+        if sql is None:
+            set_clause = ', '.join([f"{k} = ?" for k in columns])
+            sql = f"UPDATE {table} SET {set_clause} WHERE id = ? RETURNING *"
+            self._sql_cache[key] = sql
+        values = list(data.values()) + [record_id]
+
+        with self.transaction() as conn:
+            row = conn.execute(sql, values).fetchone()
+            if row is not None and side_payload is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO original_data_store (table_name, record_id, payload) VALUES (?, ?, ?)",
+                    (table, record_id, side_payload)
+                )
+
+        self._invalidate_row(table, record_id)
+        return dict(row) if row is not None else None
+
+    def get_original_data(self, table: str, record_id: str) -> Optional[str]:
+        """Return the pre-update snapshot for a pending record, if any."""
+        row = self.get(table, record_id)
+        if row is None:
+            return None
+        if row.get('original_data'):
+            return row['original_data']
+        conn = self._get_reader()
+        side = conn.execute(
+            "SELECT payload FROM original_data_store WHERE table_name = ? AND record_id = ?",
+            (table, record_id)
+        ).fetchone()
+        return side['payload'] if side else None
+
     def delete(self, table: str, record_id: str, mark_pending: bool = True) -> bool:
         """Delete a record from local cache."""
         if mark_pending:
             # Add to sync queue for deletion
             self._add_to_sync_queue(table, record_id, 'delete', None, None)
-        
-        sql = f"DELETE FROM {table} WHERE id = ?"
-        
+
+        key = ('delete', table)
+        sql = self._sql_cache.get(key)
+        if sql is None:
+            sql = f"DELETE FROM {table} WHERE id = ?"
+            self._sql_cache[key] = sql
+
         with self.transaction() as conn:
             cursor = conn.execute(sql, (record_id,))
-            return cursor.rowcount > 0
+            deleted = cursor.rowcount > 0
+
+        self._invalidate_row(table, record_id)
+        return deleted
     
+    _ROW_CACHE_SIZE = 2048
+
     def get(self, table: str, record_id: str) -> Optional[Dict[str, Any]]:
         """Get a record from local cache."""
-        sql = f"SELECT * FROM {table} WHERE id = ?"
-        
-        conn = self._get_connection()
+        cache_key = (table, record_id)
+        with self._row_cache_lock:
+            cached = self._row_cache.get(cache_key)
+            if cached is not None:
+                self._row_cache.move_to_end(cache_key)
+                # Copy so callers can mutate their row (get_invoice
+                # attaches items, etc.) without poisoning the cache
+                return dict(cached)
+
+        key = ('get', table)
+        sql = self._sql_cache.get(key)
+        if sql is None:
+            sql = f"SELECT * FROM {table} WHERE id = ?"
+            self._sql_cache[key] = sql
+
+        conn = self._get_reader()
         cursor = conn.execute(sql, (record_id,))
         row = cursor.fetchone()
-        
+
         if row:
-            return dict(row)
+            result = dict(row)
+            with self._row_cache_lock:
+                self._row_cache[cache_key] = dict(result)
+                if len(self._row_cache) > self._ROW_CACHE_SIZE:
+                    self._row_cache.popitem(last=False)
+            return result
         return None
+
+    def _invalidate_row(self, table: str, record_id: Optional[str]):
+        """Drop a row from the read cache after any write to it."""
+        with self._row_cache_lock:
+            self._row_cache.pop((table, record_id), None)
     
-    def query(self, table: str, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Query records from local cache."""
-        sql = f"SELECT * FROM {table}"
+    def iter_query(self, table: str, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None):
+        """Stream matching rows as sqlite3.Row objects.
+
+        Rows support row['col'] indexing without the per-row dict copy
+        query() pays, and callers that stop early never materialize the
+        rest of the result set.
+        """
+        if table not in self._valid_tables:
+            raise ValueError(f"Unknown table: {table}")
+
+        # Same-shaped queries (list_by_room, get_clinical_notes, ...)
+        # reuse the assembled SQL, and identical statement text lets
+        # sqlite's prepared-statement cache skip recompiling the plan
+        filter_keys = tuple(filters) if filters else ()
+        key = ('iter_query', table, filter_keys, bool(limit))
+        sql = self._sql_cache.get(key)
+
         params = []
-        
+        if sql is None:
+            sql = f"SELECT * FROM {table}"
+            if filter_keys:
+                valid_cols = self._valid_cols[table]
+                conditions = []
+                for col in filter_keys:
+                    if col not in valid_cols:
+                        raise ValueError(f"Unknown column for {table}: {col}")
+                    conditions.append(f"{col} = ?")
+                sql += " WHERE " + " AND ".join(conditions)
+            if limit:
+                # Parameterized so the same statement text (and cached
+                # plan) serves every limit value
+                sql += " LIMIT ?"
+            self._sql_cache[key] = sql
+
         if filters:
-            conditions = []
-            for key, value in filters.items():
-                conditions.append(f"{key} = ?")
-                params.append(value)
-            if conditions:
+            params.extend(filters.values())
+        if limit:
+            params.append(limit)
+
+        conn = self._get_reader()
+        yield from conn.execute(sql, params)
+
+    def iter_keyset(self, table: str, filters: Optional[Dict[str, Any]] = None,
+                    batch: int = 500):
+        """Stream every matching row in stable (created_at, id) order.
+
+        Pages with a row-value keyset predicate instead of OFFSET, so
+        each batch is a bounded range scan: memory stays O(batch)
+        however large the table grows, skipped-over rows are never
+        re-read the way OFFSET re-reads them, and rows inserted while
+        iterating cannot shift the window. Yields sqlite3.Row objects
+        like iter_query.
+        """
+        if table not in self._valid_tables:
+            raise ValueError(f"Unknown table: {table}")
+
+        filter_keys = tuple(filters) if filters else ()
+        key = ('keyset', table, filter_keys)
+        sql = self._sql_cache.get(key)
+        if sql is None:
+            valid_cols = self._valid_cols[table]
+            if 'created_at' not in valid_cols:
+                raise ValueError(f"No created_at column to key on for {table}")
+            conditions = ["(created_at, id) > (?, ?)"]
+            for col in filter_keys:
+                if col not in valid_cols:
+                    raise ValueError(f"Unknown column for {table}: {col}")
+                conditions.append(f"{col} = ?")
+            sql = (f"SELECT * FROM {table} WHERE " + " AND ".join(conditions) +
+                   " ORDER BY created_at, id LIMIT ?")
+            self._sql_cache[key] = sql
+
+        filter_values = list(filters.values()) if filters else []
+        conn = self._get_reader()
+        last = ('', '')
+        while True:
+            rows = conn.execute(sql, [*last, *filter_values, batch]).fetchall()
+            yield from rows
+            if len(rows) < batch:
+                return
+            tail = rows[-1]
+            last = (tail['created_at'], tail['id'])
+
+    def query(self, table: str, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Query records from local cache."""
+        return [dict(row) for row in self.iter_query(table, filters, limit)]
+
+    def query_columnar(self, table: str, filters: Optional[Dict[str, Any]] = None,
+                       columns: Optional[List[str]] = None,
+                       limit: Optional[int] = None) -> Dict[str, list]:
+        """Query records as columns instead of per-row dicts.
+
+        Returns {column_name: [values...]} with every column the same
+        length. List views that render hundreds of rows pay one list
+        per column rather than one ~15-key dict per row, which is a
+        several-fold saving in object overhead, and selecting only the
+        displayed columns skips decoding the rest entirely.
+        """
+        if table not in self._valid_tables:
+            raise ValueError(f"Unknown table: {table}")
+
+        # Same keying scheme as iter_query: repeated calls with the
+        # same shape reuse the assembled SQL, and byte-identical text
+        # hits the connection's prepared-statement cache
+        columns_key = tuple(columns) if columns else None
+        filter_keys = tuple(filters) if filters else ()
+        key = ('columnar', table, columns_key, filter_keys, bool(limit))
+        sql = self._sql_cache.get(key)
+        if sql is None:
+            valid_cols = self._valid_cols[table]
+            if columns:
+                for col in columns:
+                    if col not in valid_cols:
+                        raise ValueError(f"Unknown column for {table}: {col}")
+                sql = f"SELECT {', '.join(columns)} FROM {table}"
+            else:
+                sql = f"SELECT * FROM {table}"
+
+            if filter_keys:
+                conditions = []
+                for col in filter_keys:
+                    if col not in valid_cols:
+                        raise ValueError(f"Unknown column for {table}: {col}")
+                    conditions.append(f"{col} = ?")
                 sql += " WHERE " + " AND ".join(conditions)
-        
+
+            if limit:
+                sql += " LIMIT ?"
+            self._sql_cache[key] = sql
+
+        params = list(filters.values()) if filters else []
         if limit:
-            sql += f" LIMIT {limit}"
-        
-        conn = self._get_connection()
-        cursor = conn.execute(sql, params)
+            params.append(limit)
+
+        cursor = self._get_reader().execute(sql, params)
+        names = [d[0] for d in cursor.description]
+        # zip(*rows) transposes in C; an empty result still yields every
+        # requested column so callers can index unconditionally
         rows = cursor.fetchall()
-        
-        return [dict(row) for row in rows]
-    
+        if rows:
+            return dict(zip(names, (list(col) for col in zip(*rows))))
+        return {name: [] for name in names}
+
+    def delete_with_children(self, table: str, record_id: str,
+                             child_tables: Dict[str, str]) -> bool:
+        """Delete a record and its child rows in one transaction.
+
+        child_tables maps each child table to the foreign-key column
+        referencing the parent. One commit (one WAL fsync) covers the
+        parent and all children instead of a commit per table.
+        Returns True if the parent row existed.
+        """
+        if table not in self._valid_tables:
+            raise ValueError(f"Unknown table: {table}")
+        for child, fk in child_tables.items():
+            if child not in self._valid_tables:
+                raise ValueError(f"Unknown table: {child}")
+            if fk not in self._valid_cols[child]:
+                raise ValueError(f"Unknown column for {child}: {fk}")
+
+        removed = []
+        with self.transaction() as conn:
+            for child, fk in child_tables.items():
+                ids = [row[0] for row in conn.execute(
+                    f"SELECT id FROM {child} WHERE {fk} = ?", (record_id,))]
+                if ids:
+                    conn.execute(f"DELETE FROM {child} WHERE {fk} = ?", (record_id,))
+                    removed.extend((child, child_id) for child_id in ids)
+            cursor = conn.execute(f"DELETE FROM {table} WHERE id = ?", (record_id,))
+            deleted = cursor.rowcount > 0
+
+        self._invalidate_row(table, record_id)
+        for child, child_id in removed:
+            self._invalidate_row(child, child_id)
+        return deleted
+
+    def find_conflicts(self, field: str, value: str, start_time_utc: str,
+                       end_time_utc: str, exclude_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Find reservations overlapping [start, end) for a doctor or room.
+
+        The overlap predicate runs in SQL against the composite
+        (field, start, end) indexes, so the check is an index seek
+        instead of fetching every reservation for the doctor or room
+        and comparing times in Python.
+        """
+        if field not in self._valid_cols['reservations']:
+            raise ValueError(f"Unknown column for reservations: {field}")
+
+        key = ('conflicts', field, bool(exclude_id))
+        sql = self._sql_cache.get(key)
+        if sql is None:
+            sql = (f"SELECT * FROM reservations WHERE {field} = ? "
+                   "AND start_time_utc < ? AND end_time_utc > ?")
+            if exclude_id:
+                sql += " AND id != ?"
+            self._sql_cache[key] = sql
+
+        params = [value, end_time_utc, start_time_utc]
+        if exclude_id:
+            params.append(exclude_id)
+        return [dict(row) for row in self._get_reader().execute(sql, params)]
+
+    def scalar(self, sql: str, params: tuple = ()) -> Any:
+        """Run an aggregate query and return its single value.
+
+        For SUM/COUNT-style queries this keeps the arithmetic inside
+        SQLite instead of materializing rows just to fold them in
+        Python.
+        """
+        row = self._get_reader().execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    def search_clients(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Search clients by name, email, or phone inside SQLite.
+
+        Uses the clients_fts inverted index (token-prefix matching) when
+        available, otherwise a LIKE substring scan - either way the
+        filtering happens in C instead of a Python loop over every row.
+        """
+        conn = self._get_reader()
+        if self._fts_enabled:
+            match = '"' + query.replace('"', '""') + '"*'
+            cursor = conn.execute(
+                "SELECT c.* FROM clients c JOIN clients_fts f ON f.rowid = c.rowid "
+                "WHERE clients_fts MATCH ? LIMIT ?",
+                (match, limit)
+            )
+        else:
+            escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            pattern = f"%{escaped}%"
+            cursor = conn.execute(
+                "SELECT * FROM clients WHERE first_name LIKE ? ESCAPE '\\' "
+                "OR last_name LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\' "
+                "OR phone LIKE ? ESCAPE '\\' LIMIT ?",
+                (pattern, pattern, pattern, pattern, limit)
+            )
+        return [dict(row) for row in cursor]
+
     def _add_to_sync_queue(self, table: str, record_id: str, operation: str, local_data: Optional[Dict], remote_data: Optional[Dict]):
         """Add operation to sync queue."""
         queue_data = {
-            'id': str(uuid.uuid4()),
+            'id': uuid4_str(),
             'table_name': table,
             'record_id': record_id,
             'operation': operation,
             'local_data': json.dumps(local_data) if local_data else None,
             'remote_data': json.dumps(remote_data) if remote_data else None,
             'status': 'pending',
-            'created_at': datetime.utcnow().isoformat()
+            'created_at': _utcnow_iso()
         }
         
-        self.insert('sync_queue', queue_data, mark_pending=False)
+        self.insert('sync_queue', queue_data, mark_pending=False, replace=False)
     
     def get_pending_sync(self, table: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get all pending sync operations."""
@@ -382,17 +1134,79 @@ class LocalCache:
         data = {
             'pending_sync': 0,
             'sync_status': 'synced',
-            'last_synced_at': datetime.utcnow().isoformat()
+            'last_synced_at': _utcnow_iso()
         }
         self.update(table, record_id, data, mark_pending=False)
-        
+
         # Update sync queue
         sql = "UPDATE sync_queue SET status = 'synced', synced_at = ? WHERE table_name = ? AND record_id = ?"
-        conn = self._get_connection()
-        conn.execute(sql, (datetime.utcnow().isoformat(), table, record_id))
-        conn.commit()
+        with self._write_lock:
+            conn = self._get_connection()
+            conn.execute(sql, (_utcnow_iso(), table, record_id))
+            conn.execute(
+                "DELETE FROM original_data_store WHERE table_name = ? AND record_id = ?",
+                (table, record_id)
+            )
+            conn.commit()
+
+    def bulk_mark_synced(self, updates: List[tuple]):
+        """Mark many records as synced in one transaction.
+
+        `updates` is a list of (table, record_id) pairs. Collapses the
+        per-record commit (two fsyncs each) into a single transaction.
+        """
+        if not updates:
+            return
+
+        now = _utcnow_iso()
+        by_table: Dict[str, List[str]] = {}
+        for table, record_id in updates:
+            by_table.setdefault(table, []).append(record_id)
+
+        with self.transaction() as conn:
+            for table, ids in by_table.items():
+                conn.executemany(
+                    f"UPDATE {table} SET pending_sync = 0, sync_status = 'synced', last_synced_at = ? WHERE id = ?",
+                    [(now, record_id) for record_id in ids]
+                )
+                conn.executemany(
+                    "UPDATE sync_queue SET status = 'synced', synced_at = ? WHERE table_name = ? AND record_id = ?",
+                    [(now, table, record_id) for record_id in ids]
+                )
+                conn.executemany(
+                    "DELETE FROM original_data_store WHERE table_name = ? AND record_id = ?",
+                    [(table, record_id) for record_id in ids]
+                )
+
+        for table, record_id in updates:
+            self._invalidate_row(table, record_id)
+
+
+# Global instance, created on first use. Constructing LocalCache opens
+# the DB file, runs the schema DDL, and may bcrypt-hash a default admin
+# password - too much work to pay just for importing this module.
+_instance: Optional[LocalCache] = None
+
+
+def get_local_cache() -> LocalCache:
+    """Return the shared LocalCache, creating it on first call."""
+    global _instance
+    if _instance is None:
+        _instance = LocalCache()
+    return _instance
+
+
+class _LazyLocalCache:
+    """Import-time stand-in that builds the real cache on first use.
+
+    Keeps `from database.local_cache import local_cache` working for
+    existing callers while deferring database init until a method is
+    actually invoked.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_local_cache(), name)
 
 
-# Global instance
-local_cache = LocalCache()
+local_cache = _LazyLocalCache()
 
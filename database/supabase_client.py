@@ -1,18 +1,22 @@
 """Supabase client initialization and management."""
 
-from supabase import create_client, Client
-from typing import Optional
+from typing import Any, Optional
 from config.settings import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# The supabase package (and the httpx/gotrue stack it drags in) is
+# imported lazily inside _initialize_client, so SQLite-only runs never
+# pay for it at startup.
+
 
 class SupabaseManager:
     """Manages Supabase client connection."""
-    
+
     _instance: Optional['SupabaseManager'] = None
-    _client: Optional[Client] = None
+    _client: Optional[Any] = None
+    _service_client: Optional[Any] = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -31,7 +35,8 @@ class SupabaseManager:
         try:
             if not settings.supabase_url or not settings.supabase_anon_key:
                 raise ValueError("Supabase URL and anon key must be configured")
-            
+
+            from supabase import create_client
             self._client = create_client(
                 settings.supabase_url,
                 settings.supabase_anon_key
@@ -42,21 +47,38 @@ class SupabaseManager:
             raise
     
     @property
-    def client(self) -> Client:
-        """Get Supabase client instance."""
+    def client(self) -> Any:
+        """Get Supabase client instance.
+
+        Deliberately no caching of .table() request builders on top of
+        this: postgrest builders are stateful (filters and payloads
+        accumulate on the instance), so reusing one across requests
+        leaks state between calls. The part worth sharing - the httpx
+        session and its keep-alive TLS connection - already lives on
+        this single cached client, so .table() per call is just a
+        cheap object construction.
+        """
         if self._client is None:
             self._initialize_client()
         return self._client
-    
-    def get_service_client(self) -> Client:
+
+    def get_service_client(self) -> Any:
         """Get Supabase client with service role key (for admin operations)."""
+        if self._service_client is not None:
+            return self._service_client
+
         if not settings.supabase_service_role_key:
             raise ValueError("Service role key not configured")
-        
-        return create_client(
+
+        # Cached like the anon client: each create_client builds a fresh
+        # httpx connection pool, so recreating it per call paid a TCP/TLS
+        # handshake for every admin operation
+        from supabase import create_client
+        self._service_client = create_client(
             settings.supabase_url,
             settings.supabase_service_role_key
         )
+        return self._service_client
     
     def test_connection(self) -> bool:
         """Test Supabase connection."""
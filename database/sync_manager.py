@@ -3,7 +3,6 @@
 import logging
 from typing import List, Dict, Optional
 from datetime import datetime
-from database.supabase_client import supabase_manager
 from database.local_cache import local_cache
 from database.sync_queue import sync_queue
 from sync.batch_sync import BatchSync
@@ -35,23 +34,11 @@ class SyncManager:
         }
         
         try:
-            # Get all pending operations grouped by table
-            pending_ops = sync_queue.get_pending_operations()
-            
-            if not pending_ops:
-                logger.info("No pending operations to sync")
-                return results
-            
-            # Group by table for batch processing
-            by_table = {}
-            for op in pending_ops:
-                table = op['table_name']
-                if table not in by_table:
-                    by_table[table] = []
-                by_table[table].append(op)
-            
-            # Process each table in batches
-            for table, operations in by_table.items():
+            # Stream pending operations already grouped by table; the
+            # ORDER BY in the queue query does the bucketing
+            synced_any = False
+            for table, operations in sync_queue.iter_pending_by_table():
+                synced_any = True
                 try:
                     batch_results = self.batch_sync.sync_table(table, operations)
                     results['synced'] += batch_results.get('synced', 0)
@@ -62,10 +49,18 @@ class SyncManager:
                     logger.error(f"Error syncing table {table}: {e}")
                     results['failed'] += len(operations)
                     results['errors'].append(f"{table}: {str(e)}")
-            
+
+            if not synced_any:
+                logger.info("No pending operations to sync")
+                return results
+
             results['status'] = 'completed'
             logger.info(f"Sync completed: {results}")
-            
+
+            # Age out old synced rows while we're already doing queue
+            # maintenance, so the table doesn't grow without bound
+            sync_queue.clear_synced()
+
         except Exception as e:
             logger.error(f"Sync failed: {e}")
             results['status'] = 'error'
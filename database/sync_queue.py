@@ -1,66 +1,207 @@
 """Transactional sync queue management."""
 
-import json
+import itertools
 import logging
-import uuid
-from typing import List, Dict, Optional, Any
+from typing import Iterator, List, Dict, Optional, Any, Tuple
 from datetime import datetime
 from database.local_cache import local_cache
+from utils.fast_uuid import uuid4_str
+from utils.now import iso_now
+
+# orjson when available: C-implemented dumps/loads are roughly an order
+# of magnitude faster on the record dicts that flow through the queue
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    _dumps = json.dumps
+    _loads = json.loads
 
 logger = logging.getLogger(__name__)
 
 
+class LazyQueueOp(dict):
+    """Queue row that defers JSON payload parsing until first access.
+
+    Callers that only dispatch on operation/table_name (counters, the
+    grouping pass) never pay for decoding local_data/remote_data; the
+    parsed value replaces the raw string in place on first read. A raw
+    string that fails to parse is returned as-is, matching the old
+    eager behavior.
+    """
+
+    _JSON_KEYS = ('local_data', 'remote_data')
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if key in self._JSON_KEYS and isinstance(value, str) and value:
+            try:
+                value = _loads(value)
+            except Exception:
+                return value
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
 class SyncQueue:
     """Manages sync queue operations."""
     
     def __init__(self):
         self.cache = local_cache
     
-    def add_operation(self, table: str, record_id: str, operation: str, 
+    _INSERT_SQL = (
+        "INSERT INTO sync_queue (id, table_name, record_id, operation, local_data, "
+        "remote_data, status, created_at) VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)"
+    )
+
+    # Repeated updates to the same record fold into the existing pending
+    # entry; json_patch merges the payloads so delta updates accumulate
+    # instead of the newest delta clobbering earlier ones. created_at
+    # keeps the first entry's slot so replay order is stable.
+    _COALESCE_SQL = _INSERT_SQL + (
+        " ON CONFLICT(table_name, record_id, operation) "
+        "WHERE status = 'pending' AND operation = 'update' DO UPDATE SET "
+        "local_data = json_patch(coalesce(sync_queue.local_data, '{}'), coalesce(excluded.local_data, '{}')), "
+        "remote_data = excluded.remote_data"
+    )
+
+    def add_operation(self, table: str, record_id: str, operation: str,
                      local_data: Optional[Dict] = None, remote_data: Optional[Dict] = None):
-        """Add an operation to the sync queue."""
-        queue_item = {
-            'id': str(uuid.uuid4()),
-            'table_name': table,
-            'record_id': record_id,
-            'operation': operation,
-            'local_data': json.dumps(local_data) if local_data else None,
-            'remote_data': json.dumps(remote_data) if remote_data else None,
-            'status': 'pending',
-            'created_at': datetime.utcnow().isoformat()
-        }
-        
-        self.cache.insert('sync_queue', queue_item, mark_pending=False)
+        """Add an operation to the sync queue.
+
+        Rapid repeated updates to one record (autosave sessions)
+        coalesce into a single pending entry, and a delete supersedes
+        any pending update for the record - the remote only ever needs
+        the final state. A delete that lands on a still-pending create
+        cancels it outright: the remote never saw the row, so nothing
+        is queued at all.
+        """
+        params = (
+            uuid4_str(), table, record_id, operation,
+            _dumps(local_data) if local_data else None,
+            _dumps(remote_data) if remote_data else None,
+            iso_now()
+        )
+
+        with self.cache.transaction() as conn:
+            if operation == 'update':
+                conn.execute(self._COALESCE_SQL, params)
+            else:
+                if operation == 'delete':
+                    created = conn.execute(
+                        "DELETE FROM sync_queue WHERE table_name = ? AND record_id = ? "
+                        "AND operation = 'create' AND status = 'pending'",
+                        (table, record_id)
+                    ).rowcount
+                    conn.execute(
+                        "DELETE FROM sync_queue WHERE table_name = ? AND record_id = ? "
+                        "AND operation = 'update' AND status = 'pending'",
+                        (table, record_id)
+                    )
+                    if created:
+                        logger.debug(f"Cancelled pending create for {table}.{record_id}")
+                        return
+                conn.execute(self._INSERT_SQL, params)
         logger.debug(f"Added {operation} operation for {table}.{record_id} to sync queue")
+
+    def add_operation_ref(self, table: str, record_id: str, operation: str = 'update'):
+        """Queue an operation by reference, without a payload copy.
+
+        The offline write already put the final state in the domain
+        table, so serializing the merged row into the queue stores the
+        same bytes twice. A ref entry carries only the coordinates; the
+        sync worker reads the current row at flush time. Repeated
+        updates coalesce into one entry the same way payload entries
+        do.
+        """
+        self.add_operation(table, record_id, operation)
+
+    def add_operations(self, ops: List[Dict]):
+        """Queue many operations in one transaction.
+
+        Each op dict needs 'table_name', 'record_id', 'operation', and
+        optionally 'local_data'/'remote_data'. One executemany commit
+        replaces the per-item enqueue cost when e.g. an invoice's items
+        are written together.
+        """
+        if not ops:
+            return
+
+        now = iso_now()
+        rows = [
+            {
+                'id': uuid4_str(),
+                'table_name': op['table_name'],
+                'record_id': op['record_id'],
+                'operation': op['operation'],
+                'local_data': _dumps(op['local_data']) if op.get('local_data') else None,
+                'remote_data': _dumps(op['remote_data']) if op.get('remote_data') else None,
+                'status': 'pending',
+                'created_at': now
+            }
+            for op in ops
+        ]
+
+        self.cache.insert_many('sync_queue', rows)
+        logger.debug(f"Added {len(rows)} operations to sync queue")
     
     def get_pending_operations(self, table: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
-        """Get pending sync operations."""
-        filters = {'status': 'pending'}
+        """Get pending sync operations, oldest first."""
+        # status is a literal (not a bound parameter) so the planner can
+        # use the partial idx_syncq_pending index
+        sql = "SELECT * FROM sync_queue WHERE status = 'pending'"
+        params: List = []
         if table:
-            filters['table_name'] = table
-        
-        operations = self.cache.query('sync_queue', filters, limit=limit)
-        
-        # Parse JSON fields
-        for op in operations:
-            if op.get('local_data'):
-                try:
-                    op['local_data'] = json.loads(op['local_data'])
-                except:
-                    pass
-            if op.get('remote_data'):
-                try:
-                    op['remote_data'] = json.loads(op['remote_data'])
-                except:
-                    pass
-        
-        return operations
-    
+            sql += " AND table_name = ?"
+            params.append(table)
+        sql += " ORDER BY created_at"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        conn = self.cache._get_reader()
+        cursor = conn.execute(sql, params)
+        # One column-name list for the whole result set instead of a
+        # keys() call per row
+        cols = [d[0] for d in cursor.description]
+        return [LazyQueueOp(zip(cols, row)) for row in cursor]
+
+    def iter_pending_by_table(self) -> Iterator[Tuple[str, List[Dict]]]:
+        """Yield (table_name, operations) for pending ops, grouped in SQL.
+
+        Rows come back ordered by table then enqueue time, so groupby
+        streams each table's batch without first materializing the whole
+        queue and re-bucketing it in Python.
+        """
+        conn = self.cache._get_reader()
+        cursor = conn.execute(
+            "SELECT * FROM sync_queue WHERE status = 'pending' "
+            "ORDER BY table_name, created_at"
+        )
+
+        cols = [d[0] for d in cursor.description]
+        table_idx = cols.index('table_name')
+
+        for table, rows in itertools.groupby(cursor, key=lambda r: r[table_idx]):
+            yield table, [LazyQueueOp(zip(cols, row)) for row in rows]
+
     def mark_synced(self, queue_id: str, synced_at: Optional[datetime] = None):
         """Mark a queue item as synced."""
         update_data = {
             'status': 'synced',
-            'synced_at': (synced_at or datetime.utcnow()).isoformat()
+            'synced_at': synced_at.isoformat() if synced_at else iso_now()
         }
         
         self.cache.update('sync_queue', queue_id, update_data, mark_pending=False)
@@ -72,7 +213,7 @@ class SyncQueue:
             'status': 'conflict'
         }
         if remote_data:
-            update_data['remote_data'] = json.dumps(remote_data)
+            update_data['remote_data'] = _dumps(remote_data)
         
         self.cache.update('sync_queue', queue_id, update_data, mark_pending=False)
         logger.warning(f"Marked sync queue item {queue_id} as conflict")
@@ -82,14 +223,34 @@ class SyncQueue:
         self.cache.delete('sync_queue', queue_id, mark_pending=False)
     
     def get_conflicts(self) -> List[Dict]:
-        """Get all conflict items."""
-        return self.cache.query('sync_queue', {'status': 'conflict'})
+        """Get all conflict items, oldest first."""
+        conn = self.cache._get_reader()
+        cursor = conn.execute(
+            "SELECT * FROM sync_queue WHERE status = 'conflict' ORDER BY created_at"
+        )
+        cols = [d[0] for d in cursor.description]
+        return [LazyQueueOp(zip(cols, row)) for row in cursor]
     
-    def clear_synced(self, older_than_days: int = 7):
-        """Clear synced items older than specified days."""
-        # This would need a date comparison query
-        # For now, we'll keep all items for audit purposes
-        pass
+    def clear_synced(self, older_than_days: int = 7) -> int:
+        """Delete synced items older than the given number of days.
+
+        Synced rows are dead weight once past their audit window; left
+        alone the table grows without bound and every queue scan pages
+        through them. Returns the number of rows removed.
+        """
+        # Cutoff formatted like our ISO created_at stamps so the string
+        # comparison is apples-to-apples
+        with self.cache.transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM sync_queue WHERE status = 'synced' "
+                "AND created_at < strftime('%Y-%m-%dT%H:%M:%S', 'now', ?)",
+                (f'-{older_than_days} days',)
+            )
+            removed = cursor.rowcount
+
+        if removed:
+            logger.info(f"Cleared {removed} synced queue items older than {older_than_days} days")
+        return removed
 
 
 # Global instance
@@ -6,26 +6,36 @@ import os
 from pathlib import Path
 
 # #region agent log - EARLY LOGGING
-DEBUG_LOG_PATH = r"c:\Users\COWebs.lb\Desktop\my files\01-Projects\dental clinic software system\.cursor\debug.log"
+# Disabled by default: set DEBUG_LOG=1 to enable. When enabled the log
+# file is opened once with a large buffer and flushed at exit, instead
+# of an open/write/close (and its fsyncs) per call during startup.
+DEBUG_LOG_PATH = os.environ.get(
+    'DEBUG_LOG_PATH', str(Path(__file__).parent / '.cursor' / 'debug.log'))
+_DEBUG_ENABLED = os.environ.get('DEBUG_LOG', '').lower() in ('1', 'true', 'yes')
+_debug_fh = None
+
 def _debug_log(location, message, data=None, hypothesis_id=None):
+    if not _DEBUG_ENABLED:
+        return
+    global _debug_fh
     try:
-        os.makedirs(os.path.dirname(DEBUG_LOG_PATH), exist_ok=True)
-        with open(DEBUG_LOG_PATH, 'a', encoding='utf-8') as f:
-            log_entry = {
-                "location": location,
-                "message": message,
-                "data": data or {},
-                "timestamp": __import__('time').time() * 1000,
-                "sessionId": "debug-session",
-                "runId": "run1",
-                "hypothesisId": hypothesis_id
-            }
-            f.write(json.dumps(log_entry) + '\n')
-    except Exception as e:
-        try:
-            with open(DEBUG_LOG_PATH + '.error', 'a', encoding='utf-8') as f:
-                f.write(f"Log error: {str(e)}\n")
-        except: pass
+        if _debug_fh is None:
+            import atexit
+            os.makedirs(os.path.dirname(DEBUG_LOG_PATH), exist_ok=True)
+            _debug_fh = open(DEBUG_LOG_PATH, 'a', encoding='utf-8', buffering=1 << 16)
+            atexit.register(_debug_fh.close)
+        log_entry = {
+            "location": location,
+            "message": message,
+            "data": data or {},
+            "timestamp": __import__('time').time() * 1000,
+            "sessionId": "debug-session",
+            "runId": "run1",
+            "hypothesisId": hypothesis_id
+        }
+        _debug_fh.write(json.dumps(log_entry) + '\n')
+    except Exception:
+        pass
 # #endregion
 
 # #region agent log
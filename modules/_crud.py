@@ -0,0 +1,184 @@
+"""Shared CRUD plumbing for the offline-first table managers."""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterator, List, Optional
+
+from database.supabase_client import supabase_manager
+from database.local_cache import local_cache
+from database.sync_queue import sync_queue
+from utils.network_monitor import network_monitor
+from utils.task_runner import task_runner
+from auth.permission_validator import permission_validator
+from utils.now import iso_now
+
+logger = logging.getLogger(__name__)
+
+
+def push_background(table: str, label: str, record_id: str,
+                    operation: str, row: Optional[Dict] = None) -> None:
+    """Run one Supabase write off the UI thread.
+
+    The local cache is already updated (and the row marked pending)
+    when this is called, so the caller returns immediately. On success
+    the row is marked synced; on failure the write is queued for the
+    next sync pass and the app drops to offline mode, so nothing is
+    lost.
+    """
+
+    def _push():
+        builder = supabase_manager.client.table(table)
+        if operation == 'create':
+            builder.insert(row, returning='minimal').execute()
+        elif operation == 'update':
+            builder.update(row).eq('id', record_id).execute()
+        else:
+            builder.delete().eq('id', record_id).execute()
+
+    def _ok(_result):
+        if operation != 'delete':
+            local_cache.mark_synced(table, record_id)
+
+    def _err(exc):
+        logger.error("Background %s for %s %s failed: %s",
+                     operation, label, record_id, exc)
+        if operation == 'update':
+            # Payload-free: the sync worker reads the current row at
+            # flush time
+            sync_queue.add_operation_ref(table, record_id, 'update')
+        else:
+            sync_queue.add_operation(table, record_id, operation, row or {})
+        network_monitor.mark_offline()
+
+    task_runner.submit(_push, on_ok=_ok, on_err=_err)
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """The table-specific facts the generic CRUD paths need."""
+
+    table: str
+    label: str  # human name used in log and error messages
+    permission: str  # permission required for writes
+    update_keys: FrozenSet[str]
+
+
+class CrudManager:
+    """Generic create/update/get/list/delete over one cached table.
+
+    Doctor, equipment, insurance-claim and clinical-note management all
+    carried the same method bodies with only the table name, permission
+    and update allow-list varying. Keeping one copy here means the
+    optimistic online create, the UPDATE..RETURNING offline update and
+    the columnar list path are applied - and fixed - once instead of
+    per manager.
+
+    Subclasses set SPEC and implement _build_row; anything genuinely
+    table-specific (extra list filters, secondary tables, bulk paths)
+    stays on the subclass.
+    """
+
+    SPEC: TableSpec
+
+    def _build_row(self, data: Dict, now: str) -> Dict:
+        """Build a full table row (including its id) from raw input."""
+        raise NotImplementedError
+
+    def _base_update_data(self, data: Dict) -> Dict:
+        """Seed update_data; subclasses add always-written columns."""
+        return {'updated_at': iso_now()}
+
+    def create(self, data: Dict) -> tuple[bool, Optional[str], Optional[str]]:
+        """Create a record."""
+        spec = self.SPEC
+        if not permission_validator.validate(spec.permission):
+            return False, None, "Permission denied"
+
+        row = self._build_row(data, iso_now())
+        record_id = row['id']
+
+        try:
+            if network_monitor.is_online():
+                # Optimistic: commit locally as pending and return at
+                # once; the Supabase round-trip runs off the UI thread
+                local_cache.insert(spec.table, row, mark_pending=True)
+                push_background(spec.table, spec.label, record_id, 'create', row)
+                return True, record_id, None
+            else:
+                local_cache.insert_with_pending(spec.table, row)
+                return True, record_id, None
+        except Exception as e:
+            logger.error("Error creating %s: %s", spec.label, e)
+            return False, None, str(e)
+
+    def update(self, record_id: str, data: Dict) -> tuple[bool, Optional[str]]:
+        """Update a record."""
+        spec = self.SPEC
+        if not permission_validator.validate(spec.permission):
+            return False, "Permission denied"
+
+        update_data = self._base_update_data(data)
+        update_data.update({key: data[key] for key in data.keys() & spec.update_keys})
+
+        try:
+            # UPDATE..RETURNING doubles as the existence check; copy
+            # the payload first because the local write adds its
+            # sync-tracking columns to the dict
+            payload = dict(update_data)
+            merged = local_cache.update_returning(spec.table, record_id, update_data)
+            if not merged:
+                return False, f"{spec.label.capitalize()} not found"
+            if network_monitor.is_online():
+                # Optimistic: the remote update runs off the UI thread
+                push_background(spec.table, spec.label, record_id, 'update', payload)
+            else:
+                # Payload-free: the sync worker reads the current row
+                # at flush time, so the merged dict is never serialized
+                # a second time
+                sync_queue.add_operation_ref(spec.table, record_id, 'update')
+            return True, None
+        except Exception as e:
+            logger.error("Error updating %s: %s", spec.label, e)
+            return False, str(e)
+
+    def get(self, record_id: str) -> Optional[Dict]:
+        """Get a record by ID."""
+        return local_cache.get(self.SPEC.table, record_id)
+
+    def list_all(self, limit: int = 100) -> List[Dict]:
+        """List all records."""
+        return local_cache.query(self.SPEC.table, limit=limit)
+
+    def list_all_columns(self, columns: Optional[List[str]] = None, limit: int = 100) -> Dict[str, list]:
+        """List all records as columns, for table views.
+
+        Returns {column: [values...]}; a fraction of the memory of
+        list_all's per-row dicts when rendering hundreds of rows.
+        """
+        return local_cache.query_columnar(self.SPEC.table, columns=columns, limit=limit)
+
+    def list_all_iter(self, batch: int = 500) -> Iterator:
+        """Stream all records in stable (created_at, id) order.
+
+        Keyset-paginated, so exports and other full-table consumers
+        hold one batch in memory instead of the whole table.
+        """
+        return local_cache.iter_keyset(self.SPEC.table, batch=batch)
+
+    def delete(self, record_id: str) -> tuple[bool, Optional[str]]:
+        """Delete a record."""
+        spec = self.SPEC
+        if not permission_validator.validate(spec.permission):
+            return False, "Permission denied"
+
+        try:
+            local_cache.delete(spec.table, record_id, mark_pending=False)
+            if network_monitor.is_online():
+                # Optimistic: the remote delete runs off the UI thread
+                push_background(spec.table, spec.label, record_id, 'delete')
+            else:
+                sync_queue.add_operation(spec.table, record_id, 'delete', {})
+            return True, None
+        except Exception as e:
+            logger.error("Error deleting %s: %s", spec.label, e)
+            return False, str(e)
@@ -1,17 +1,24 @@
 """Billing and invoicing module."""
 
 import logging
-import uuid
-from typing import List, Dict, Optional
-from datetime import datetime
+import secrets
+from typing import Iterator, List, Dict, Optional
 from database.supabase_client import supabase_manager
 from database.local_cache import local_cache
 from database.sync_queue import sync_queue
 from utils.network_monitor import network_monitor
 from auth.permission_validator import permission_validator
+from utils.fast_uuid import uuid4_str
+from utils.now import iso_now, today_str
+from utils.invoice_math import invoice_totals
 
 logger = logging.getLogger(__name__)
 
+_INVOICE_UPDATE_KEYS = frozenset({
+    'client_id', 'reservation_id', 'treatment_plan_id', 'issue_date',
+    'due_date', 'tax_rate', 'discount', 'status', 'notes'
+})
+
 
 class BillingManager:
     """Manages billing and invoicing."""
@@ -21,16 +28,14 @@ class BillingManager:
         if not permission_validator.validate('edit_billing'):
             return False, None, "Permission denied"
         
-        invoice_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
+        invoice_id = uuid4_str()
+        now = iso_now()
         
         # Calculate totals
         items = data.get('items', [])
-        subtotal = sum(item.get('total', 0) for item in items)
-        tax_rate = data.get('tax_rate', 0.0)
-        tax = subtotal * (tax_rate / 100)
         discount = data.get('discount', 0.0)
-        total = subtotal + tax - discount
+        tax_rate = data.get('tax_rate', 0.0)
+        subtotal, tax, total = invoice_totals(items, tax_rate, discount)
         
         invoice_data = {
             'id': invoice_id,
@@ -41,6 +46,7 @@ class BillingManager:
             'issue_date': data.get('issue_date', now[:10]),
             'due_date': data.get('due_date', ''),
             'subtotal': subtotal,
+            'tax_rate': tax_rate,
             'tax': tax,
             'discount': discount,
             'total': total,
@@ -57,34 +63,57 @@ class BillingManager:
                 response = supabase_client.table('invoices').insert(invoice_data).execute()
                 if response.data:
                     local_cache.insert('invoices', invoice_data, mark_pending=False)
-                    # Add invoice items
-                    for item in items:
-                        self.add_invoice_item(invoice_id, item)
+                    # One batched insert for all items instead of a
+                    # round-trip per item
+                    item_rows = [self._build_item_row(invoice_id, item, now) for item in items]
+                    if item_rows:
+                        supabase_client.table('invoice_items').insert(item_rows).execute()
+                        local_cache.insert_many('invoice_items', item_rows)
                     return True, invoice_id, None
                 return False, None, "Failed to create invoice"
             else:
-                local_cache.insert('invoices', invoice_data, mark_pending=True)
-                sync_queue.add_operation('invoices', invoice_id, 'create', invoice_data)
+                # Single commit (one fsync) for the invoice, its items
+                # and all their queue entries
+                item_rows = [self._build_item_row(invoice_id, item, now) for item in items]
+                with local_cache.transaction():
+                    local_cache.insert('invoices', invoice_data, mark_pending=True)
+                    if item_rows:
+                        local_cache.insert_many('invoice_items', item_rows, mark_pending=True)
+                    sync_queue.add_operation('invoices', invoice_id, 'create', invoice_data)
+                    sync_queue.add_operations([
+                        {'table_name': 'invoice_items', 'record_id': row['id'],
+                         'operation': 'create', 'local_data': row}
+                        for row in item_rows
+                    ])
                 return True, invoice_id, None
         except Exception as e:
             logger.error(f"Error creating invoice: {e}")
             return False, None, str(e)
-    
-    def add_invoice_item(self, invoice_id: str, item_data: Dict) -> tuple[bool, Optional[str]]:
-        """Add item to invoice."""
-        item_id = str(uuid.uuid4())
-        
-        item = {
-            'id': item_id,
+
+    def _build_item_row(self, invoice_id: str, item_data: Dict, now: Optional[str] = None) -> Dict:
+        """Build an invoice_items row from raw item data.
+
+        Deliberately a plain dict rather than a slotted dataclass:
+        every consumer - insert/insert_many, the queue's JSON payload,
+        the Supabase client - takes a mapping, so a class here would be
+        built once and converted straight back, paying for both.
+        """
+        return {
+            'id': uuid4_str(),
             'invoice_id': invoice_id,
             'description': item_data.get('description', ''),
             'procedure_id': item_data.get('procedure_id'),
             'quantity': item_data.get('quantity', 1),
             'unit_price': item_data.get('unit_price', 0.0),
             'total': item_data.get('total', 0.0),
-            'created_at': datetime.utcnow().isoformat()
+            'created_at': now or iso_now()
         }
-        
+    
+    def add_invoice_item(self, invoice_id: str, item_data: Dict) -> tuple[bool, Optional[str]]:
+        """Add item to invoice."""
+        item = self._build_item_row(invoice_id, item_data)
+        item_id = item['id']
+
         try:
             if network_monitor.is_online():
                 supabase_client = supabase_manager.client
@@ -111,23 +140,26 @@ class BillingManager:
     
     def get_outstanding_balance(self, client_id: str) -> float:
         """Get outstanding balance for a client."""
-        invoices = local_cache.query('invoices', {'client_id': client_id})
-        balance = 0.0
-        
-        for invoice in invoices:
-            if invoice.get('status') in ['pending', 'overdue']:
-                balance += invoice.get('total', 0.0)
-        
-        return balance
+        # Summed in SQLite (index-only scan on idx_inv_outstanding)
+        # rather than looping over the client's invoices in Python
+        return local_cache.scalar(
+            "SELECT COALESCE(SUM(total), 0) FROM invoices "
+            "WHERE client_id = ? AND status IN ('pending', 'overdue')",
+            (client_id,)
+        )
     
     def _generate_invoice_number(self) -> str:
         """Generate invoice number."""
         # Simple implementation - can be enhanced
-        return f"INV-{datetime.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:6].upper()}"
+        return f"INV-{today_str()}-{secrets.token_hex(3).upper()}"
     
     def list_all(self, limit: int = 100) -> List[Dict]:
         """List all invoices."""
         return local_cache.query('invoices', limit=limit)
+
+    def list_all_iter(self, batch: int = 500) -> Iterator:
+        """Stream all invoices in stable (created_at, id) order."""
+        return local_cache.iter_keyset('invoices', batch=batch)
     
     def update(self, invoice_id: str, data: Dict) -> tuple[bool, Optional[str]]:
         """Update invoice."""
@@ -137,28 +169,22 @@ class BillingManager:
         # Recalculate totals if items changed
         items = data.get('items', [])
         if items:
-            subtotal = sum(item.get('total', 0) for item in items)
-            tax_rate = data.get('tax_rate', 0.0)
-            tax = subtotal * (tax_rate / 100)
             discount = data.get('discount', 0.0)
-            total = subtotal + tax - discount
-            
+            subtotal, tax, total = invoice_totals(items, data.get('tax_rate', 0.0), discount)
+
             update_data = {
                 'subtotal': subtotal,
                 'tax': tax,
                 'discount': discount,
                 'total': total,
-                'updated_at': datetime.utcnow().isoformat()
+                'updated_at': iso_now()
             }
         else:
             update_data = {
-                'updated_at': datetime.utcnow().isoformat()
+                'updated_at': iso_now()
             }
         
-        for key in ['client_id', 'reservation_id', 'treatment_plan_id', 'issue_date', 
-                   'due_date', 'tax_rate', 'discount', 'status', 'notes']:
-            if key in data:
-                update_data[key] = data[key]
+        update_data.update({key: data[key] for key in data.keys() & _INVOICE_UPDATE_KEYS})
         
         try:
             if network_monitor.is_online():
@@ -168,19 +194,36 @@ class BillingManager:
                     local_cache.update('invoices', invoice_id, update_data, mark_pending=False)
                     # Update items if provided
                     if items:
-                        # Delete old items
+                        # Delete old items, then insert the replacements
+                        # in one batched call
                         supabase_client.table('invoice_items').delete().eq('invoice_id', invoice_id).execute()
-                        # Add new items
-                        for item in items:
-                            self.add_invoice_item(invoice_id, item)
+                        item_rows = [self._build_item_row(invoice_id, item) for item in items]
+                        supabase_client.table('invoice_items').insert(item_rows).execute()
+                        for old in local_cache.query('invoice_items', {'invoice_id': invoice_id}):
+                            local_cache.delete('invoice_items', old['id'], mark_pending=False)
+                        local_cache.insert_many('invoice_items', item_rows)
                     return True, None
                 return False, "Failed to update invoice"
             else:
-                existing = self.get_invoice(invoice_id)
-                if existing:
-                    merged_data = {**existing, **update_data}
-                    local_cache.update('invoices', invoice_id, update_data, mark_pending=True)
-                    sync_queue.add_operation('invoices', invoice_id, 'update', merged_data)
+                # UPDATE..RETURNING doubles as the existence check; the
+                # queue entry is payload-free - the sync worker reads
+                # the current row at flush time
+                merged = local_cache.update_returning('invoices', invoice_id, update_data)
+                if merged:
+                    # Queue entry, item replacement and the items' queue
+                    # entries all commit together
+                    with local_cache.transaction():
+                        sync_queue.add_operation_ref('invoices', invoice_id, 'update')
+                        if items:
+                            for old in local_cache.query('invoice_items', {'invoice_id': invoice_id}):
+                                local_cache.delete('invoice_items', old['id'], mark_pending=True)
+                            item_rows = [self._build_item_row(invoice_id, item) for item in items]
+                            local_cache.insert_many('invoice_items', item_rows, mark_pending=True)
+                            sync_queue.add_operations([
+                                {'table_name': 'invoice_items', 'record_id': row['id'],
+                                 'operation': 'create', 'local_data': row}
+                                for row in item_rows
+                            ])
                     return True, None
                 return False, "Invoice not found"
         except Exception as e:
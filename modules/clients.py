@@ -1,18 +1,29 @@
 """Client management module."""
 
 import logging
-import uuid
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 from datetime import datetime
 from database.supabase_client import supabase_manager
 from database.local_cache import local_cache
 from database.sync_queue import sync_queue
 from utils.network_monitor import network_monitor
+from utils.task_runner import task_runner
 from auth.permission_validator import permission_validator
+from utils.fast_uuid import uuid4_str
+from utils.now import iso_now
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+_CLIENT_UPDATE_KEYS = frozenset({
+    'first_name', 'last_name', 'phone', 'email', 'date_of_birth', 'address',
+    'medical_history', 'notes'
+})
+
+# auth_mode is fixed for the process lifetime; resolve the branch once
+# instead of consulting settings on every CRUD call
+_SQLITE_MODE = settings.auth_mode == 'sqlite'
+
 
 class ClientManager:
     """Manages client operations."""
@@ -22,8 +33,8 @@ class ClientManager:
         if not permission_validator.validate('edit_clients'):
             return False, None, "Permission denied"
         
-        client_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
+        client_id = uuid4_str()
+        now = iso_now()
         
         client_data = {
             'id': client_id,
@@ -43,24 +54,33 @@ class ClientManager:
         
         try:
             # If using SQLite mode, always use local cache
-            if settings.auth_mode == 'sqlite':
+            if _SQLITE_MODE:
                 local_cache.insert('clients', client_data, mark_pending=False)
                 logger.info(f"Client {client_id} created (SQLite mode)")
                 return True, client_id, None
             
             # Supabase mode: check network status
             if network_monitor.is_online():
-                # Online: Save to Supabase
-                supabase_client = supabase_manager.client
-                response = supabase_client.table('clients').insert(client_data).execute()
-                
-                if response.data:
-                    # Update local cache
-                    local_cache.insert('clients', client_data, mark_pending=False)
-                    logger.info(f"Client {client_id} created")
-                    return True, client_id, None
-                else:
-                    return False, None, "Failed to create client"
+                # Online: commit locally as pending and return at once;
+                # the Supabase round-trip runs off the UI thread
+                local_cache.insert('clients', client_data, mark_pending=True)
+
+                def _push():
+                    supabase_manager.client.table('clients').insert(client_data).execute()
+
+                def _ok(_result):
+                    local_cache.mark_synced('clients', client_id)
+
+                def _err(exc):
+                    # Leave the row pending and queue it for the next
+                    # sync pass instead of losing the write
+                    logger.error(f"Background create for client {client_id} failed: {exc}")
+                    sync_queue.add_operation('clients', client_id, 'create', client_data)
+                    network_monitor.mark_offline()
+
+                task_runner.submit(_push, on_ok=_ok, on_err=_err)
+                logger.info(f"Client {client_id} created, push running in background")
+                return True, client_id, None
             else:
                 # Offline: Save to local cache and queue
                 local_cache.insert('clients', client_data, mark_pending=True)
@@ -84,18 +104,15 @@ class ClientManager:
         
         # Update fields
         update_data = {
-            'updated_at': datetime.utcnow().isoformat(),
+            'updated_at': iso_now(),
             'last_modified_by': data.get('last_modified_by', '')
         }
         
-        for key in ['first_name', 'last_name', 'phone', 'email', 'date_of_birth',
-                    'address', 'medical_history', 'notes']:
-            if key in data:
-                update_data[key] = data[key]
+        update_data.update({key: data[key] for key in data.keys() & _CLIENT_UPDATE_KEYS})
         
         try:
             # If using SQLite mode, always use local cache
-            if settings.auth_mode == 'sqlite':
+            if _SQLITE_MODE:
                 local_cache.update('clients', client_id, update_data, mark_pending=False)
                 logger.info(f"Client {client_id} updated (SQLite mode)")
                 return True, None
@@ -114,10 +131,12 @@ class ClientManager:
                 else:
                     return False, "Failed to update client"
             else:
-                # Offline: Update local cache and queue
-                merged_data = {**existing, **update_data}
+                # Offline: Update local cache and queue. Only the
+                # changed columns go through the queue - Supabase
+                # applies partial updates, so shipping the full row
+                # just bloats the serialized payload
                 local_cache.update('clients', client_id, update_data, mark_pending=True)
-                sync_queue.add_operation('clients', client_id, 'update', merged_data)
+                sync_queue.add_operation('clients', client_id, 'update', update_data)
                 logger.info(f"Client {client_id} updated offline, queued for sync")
                 return True, None
         
@@ -132,7 +151,7 @@ class ClientManager:
         
         try:
             # If using SQLite mode, always use local cache
-            if settings.auth_mode == 'sqlite':
+            if _SQLITE_MODE:
                 local_cache.delete('clients', client_id, mark_pending=False)
                 logger.info(f"Client {client_id} deleted (SQLite mode)")
                 return True, None
@@ -189,21 +208,10 @@ class ClientManager:
         if not permission_validator.validate('view_clients'):
             return []
         
-        results = []
-        
-        # Search local cache
-        all_clients = local_cache.query('clients', limit=limit * 2)
-        
+        # Search local cache inside SQLite (FTS5 when available)
+        results = local_cache.search_clients(query, limit=limit)
         query_lower = query.lower()
-        for client in all_clients:
-            if (query_lower in client.get('first_name', '').lower() or
-                query_lower in client.get('last_name', '').lower() or
-                query_lower in client.get('email', '').lower() or
-                query_lower in client.get('phone', '').lower()):
-                results.append(client)
-                if len(results) >= limit:
-                    break
-        
+
         # If online, also search Supabase
         if network_monitor.is_online() and len(results) < limit:
             try:
@@ -236,6 +244,12 @@ class ClientManager:
         
         return local_cache.query('clients', limit=limit)
 
+    def list_all_iter(self, batch: int = 500) -> Iterator:
+        """Stream all clients in stable (created_at, id) order."""
+        if not permission_validator.validate('view_clients'):
+            return iter(())
+        return local_cache.iter_keyset('clients', batch=batch)
+
 
 # Global instance
 client_manager = ClientManager()
@@ -1,17 +1,36 @@
 """Document management module."""
 
 import logging
-import uuid
+import mimetypes
+import os
 from typing import List, Dict, Optional
-from datetime import datetime
 from database.supabase_client import supabase_manager
 from database.local_cache import local_cache
 from database.sync_queue import sync_queue
 from utils.network_monitor import network_monitor
 from auth.permission_validator import permission_validator
+from utils.fast_uuid import uuid4_str
+from utils.now import iso_now
 
 logger = logging.getLogger(__name__)
 
+# The document types a clinic actually uploads, resolved with one dict
+# lookup; mimetypes.guess_type (which walks its whole type map and
+# misses DICOM entirely) only runs for anything unusual
+_EXT_MIME = {
+    '.pdf': 'application/pdf',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.tif': 'image/tiff',
+    '.tiff': 'image/tiff',
+    '.dcm': 'application/dicom',
+    '.doc': 'application/msword',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.txt': 'text/plain',
+}
+
 
 class DocumentManager:
     """Manages documents."""
@@ -26,28 +45,34 @@ class DocumentManager:
             if network_monitor.is_online():
                 # Upload to Supabase Storage
                 supabase_client = supabase_manager.client
-                file_name = file_path.split('/')[-1]
+                file_name = os.path.basename(file_path)
                 storage_path = f"documents/{client_id}/{file_name}"
-                
-                with open(file_path, 'rb') as f:
-                    file_data = f.read()
-                    response = supabase_client.storage.from_('documents').upload(
-                        storage_path, file_data
-                    )
-                
+                file_size = os.stat(file_path).st_size
+                ext = os.path.splitext(file_name)[1].lower()
+                mime_type = (_EXT_MIME.get(ext)
+                             or mimetypes.guess_type(file_name)[0]
+                             or 'application/octet-stream')
+
+                # Hand storage-py the path so it streams from disk
+                # instead of holding the whole file (X-ray scans run to
+                # tens of MB) in memory
+                response = supabase_client.storage.from_('documents').upload(
+                    storage_path, file_path, file_options={'content-type': mime_type}
+                )
+
                 if response:
                     # Create document record
-                    doc_id = str(uuid.uuid4())
-                    now = datetime.utcnow().isoformat()
-                    
+                    doc_id = uuid4_str()
+                    now = iso_now()
+
                     doc_data = {
                         'id': doc_id,
                         'client_id': client_id,
                         'document_type': document_type,
                         'file_path': storage_path,
                         'file_name': file_name,
-                        'file_size': len(file_data),
-                        'mime_type': 'application/octet-stream',  # TODO: detect MIME type
+                        'file_size': file_size,
+                        'mime_type': mime_type,
                         'description': description,
                         'uploaded_by': '',  # TODO: get from auth
                         'uploaded_at': now,
@@ -66,7 +91,7 @@ class DocumentManager:
                 return False, None, "Cannot upload documents while offline"
         
         except Exception as e:
-            logger.error(f"Error uploading document: {e}")
+            logger.error("Error uploading document: %s", e)
             return False, None, str(e)
     
     def get_documents(self, client_id: str) -> List[Dict]:
@@ -1,29 +1,44 @@
 """Insurance management module."""
 
 import logging
-import uuid
+import secrets
 from typing import List, Dict, Optional
-from datetime import datetime
 from database.supabase_client import supabase_manager
 from database.local_cache import local_cache
 from database.sync_queue import sync_queue
 from utils.network_monitor import network_monitor
+from utils.task_runner import task_runner
 from auth.permission_validator import permission_validator
+from modules._crud import CrudManager, TableSpec
+from utils.fast_uuid import uuid4_str
+from utils.now import iso_now, today_str
 
 logger = logging.getLogger(__name__)
 
+_CLAIM_UPDATE_KEYS = frozenset({
+    'client_id', 'reservation_id', 'insurance_company_id', 'submission_date',
+    'amount', 'status', 'response_date', 'notes'
+})
 
-class InsuranceManager:
+
+class InsuranceManager(CrudManager):
     """Manages insurance."""
-    
+
+    SPEC = TableSpec(
+        table='insurance_claims',
+        label='insurance claim',
+        permission='edit_billing',
+        update_keys=_CLAIM_UPDATE_KEYS,
+    )
+
     def create_insurance_company(self, data: Dict) -> tuple[bool, Optional[str], Optional[str]]:
         """Create insurance company."""
         if not permission_validator.validate('manage_settings'):
             return False, None, "Permission denied"
-        
-        company_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
-        
+
+        company_id = uuid4_str()
+        now = iso_now()
+
         company_data = {
             'id': company_id,
             'company_name': data.get('company_name', ''),
@@ -34,33 +49,43 @@ class InsuranceManager:
             'created_at': now,
             'updated_at': now
         }
-        
+
         try:
             if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                response = supabase_client.table('insurance_companies').insert(company_data).execute()
-                if response.data:
-                    local_cache.insert('insurance_companies', company_data, mark_pending=False)
-                    return True, company_id, None
-                return False, None, "Failed to create insurance company"
-            else:
+                # Optimistic: commit locally as pending and return at
+                # once; the Supabase round-trip runs off the UI thread
                 local_cache.insert('insurance_companies', company_data, mark_pending=True)
-                sync_queue.add_operation('insurance_companies', company_id, 'create', company_data)
+
+                def _push():
+                    supabase_manager.client.table('insurance_companies').insert(
+                        company_data, returning='minimal').execute()
+
+                def _ok(_result):
+                    local_cache.mark_synced('insurance_companies', company_id)
+
+                def _err(exc):
+                    # Leave the row pending and queue it for the next
+                    # sync pass instead of losing the write
+                    logger.error("Background create for insurance company %s failed: %s", company_id, exc)
+                    sync_queue.add_operation('insurance_companies', company_id, 'create', company_data)
+                    network_monitor.mark_offline()
+
+                task_runner.submit(_push, on_ok=_ok, on_err=_err)
+                return True, company_id, None
+            else:
+                local_cache.insert_with_pending('insurance_companies', company_data)
                 return True, company_id, None
         except Exception as e:
-            logger.error(f"Error creating insurance company: {e}")
+            logger.error("Error creating insurance company: %s", e)
             return False, None, str(e)
-    
+
     def create_claim(self, data: Dict) -> tuple[bool, Optional[str], Optional[str]]:
         """Create insurance claim."""
-        if not permission_validator.validate('edit_billing'):
-            return False, None, "Permission denied"
-        
-        claim_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
-        
-        claim_data = {
-            'id': claim_id,
+        return self.create(data)
+
+    def _build_row(self, data: Dict, now: str) -> Dict:
+        return {
+            'id': uuid4_str(),
             'client_id': data.get('client_id'),
             'reservation_id': data.get('reservation_id'),
             'insurance_company_id': data.get('insurance_company_id'),
@@ -74,91 +99,44 @@ class InsuranceManager:
             'created_at': now,
             'updated_at': now
         }
-        
+
+    def create_claims_bulk(self, claims: List[Dict]) -> tuple[bool, List[str], Optional[str]]:
+        """Create many insurance claims in one batch.
+
+        End-of-day claim submission creates rows by the dozen; this
+        path costs one Supabase insert and one local transaction for
+        the whole list instead of one of each per claim.
+        """
+        if not permission_validator.validate('edit_billing'):
+            return False, [], "Permission denied"
+        if not claims:
+            return True, [], None
+
+        now = iso_now()
+        claim_rows = [self._build_row(data, now) for data in claims]
+        claim_ids = [row['id'] for row in claim_rows]
+
         try:
             if network_monitor.is_online():
                 supabase_client = supabase_manager.client
-                response = supabase_client.table('insurance_claims').insert(claim_data).execute()
-                if response.data:
-                    local_cache.insert('insurance_claims', claim_data, mark_pending=False)
-                    return True, claim_id, None
-                return False, None, "Failed to create claim"
+                supabase_client.table('insurance_claims').insert(claim_rows, returning='minimal').execute()
+                local_cache.insert_many('insurance_claims', claim_rows)
             else:
-                local_cache.insert('insurance_claims', claim_data, mark_pending=True)
-                sync_queue.add_operation('insurance_claims', claim_id, 'create', claim_data)
-                return True, claim_id, None
+                local_cache.insert_many('insurance_claims', claim_rows, mark_pending=True)
+                sync_queue.add_operations([
+                    {'table_name': 'insurance_claims', 'record_id': row['id'],
+                     'operation': 'create', 'local_data': row}
+                    for row in claim_rows
+                ])
+            return True, claim_ids, None
         except Exception as e:
-            logger.error(f"Error creating claim: {e}")
-            return False, None, str(e)
-    
+            logger.error("Error creating claims in bulk: %s", e)
+            return False, [], str(e)
+
     def _generate_claim_number(self) -> str:
         """Generate claim number."""
-        return f"CLM-{datetime.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:6].upper()}"
-    
-    def list_all(self, limit: int = 100) -> List[Dict]:
-        """List all insurance claims."""
-        return local_cache.query('insurance_claims', limit=limit)
-    
-    def get(self, claim_id: str) -> Optional[Dict]:
-        """Get insurance claim by ID."""
-        return local_cache.get('insurance_claims', claim_id)
-    
-    def update(self, claim_id: str, data: Dict) -> tuple[bool, Optional[str]]:
-        """Update insurance claim."""
-        if not permission_validator.validate('edit_billing'):
-            return False, "Permission denied"
-        
-        update_data = {
-            'updated_at': datetime.utcnow().isoformat()
-        }
-        
-        for key in ['client_id', 'reservation_id', 'insurance_company_id', 'submission_date',
-                   'amount', 'status', 'response_date', 'notes']:
-            if key in data:
-                update_data[key] = data[key]
-        
-        try:
-            if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                response = supabase_client.table('insurance_claims').update(update_data).eq('id', claim_id).execute()
-                if response.data:
-                    local_cache.update('insurance_claims', claim_id, update_data, mark_pending=False)
-                    return True, None
-                return False, "Failed to update insurance claim"
-            else:
-                existing = self.get(claim_id)
-                if existing:
-                    merged_data = {**existing, **update_data}
-                    local_cache.update('insurance_claims', claim_id, update_data, mark_pending=True)
-                    sync_queue.add_operation('insurance_claims', claim_id, 'update', merged_data)
-                    return True, None
-                return False, "Insurance claim not found"
-        except Exception as e:
-            logger.error(f"Error updating insurance claim: {e}")
-            return False, str(e)
-    
-    def delete(self, claim_id: str) -> tuple[bool, Optional[str]]:
-        """Delete insurance claim."""
-        if not permission_validator.validate('edit_billing'):
-            return False, "Permission denied"
-        
-        try:
-            if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                response = supabase_client.table('insurance_claims').delete().eq('id', claim_id).execute()
-                if response.data:
-                    local_cache.delete('insurance_claims', claim_id, mark_pending=False)
-                    return True, None
-                return False, "Failed to delete insurance claim"
-            else:
-                local_cache.delete('insurance_claims', claim_id, mark_pending=True)
-                sync_queue.add_operation('insurance_claims', claim_id, 'delete', {})
-                return True, None
-        except Exception as e:
-            logger.error(f"Error deleting insurance claim: {e}")
-            return False, str(e)
+        return f"CLM-{today_str()}-{secrets.token_hex(3).upper()}"
 
 
 # Global instance
 insurance_manager = InsuranceManager()
-
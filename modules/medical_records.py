@@ -1,31 +1,43 @@
 """Medical records and dental charts module."""
 
 import logging
-import uuid
 from typing import List, Dict, Optional
-from datetime import datetime
 from database.supabase_client import supabase_manager
 from database.local_cache import local_cache
 from database.sync_queue import sync_queue
 from utils.network_monitor import network_monitor
+from utils.task_runner import task_runner
 from auth.permission_validator import permission_validator
+from modules._crud import CrudManager, TableSpec
+from utils.fast_uuid import uuid4_str
+from utils.now import iso_now
 
 logger = logging.getLogger(__name__)
 
+_NOTE_UPDATE_KEYS = frozenset({
+    'client_id', 'reservation_id', 'doctor_id', 'visit_date_utc',
+    'chief_complaint', 'examination', 'diagnosis', 'treatment_rendered',
+    'notes'
+})
 
-class MedicalRecordsManager:
+
+class MedicalRecordsManager(CrudManager):
     """Manages medical records."""
-    
+
+    SPEC = TableSpec(
+        table='clinical_notes',
+        label='clinical note',
+        permission='edit_medical_records',
+        update_keys=_NOTE_UPDATE_KEYS,
+    )
+
     def create_clinical_note(self, data: Dict) -> tuple[bool, Optional[str], Optional[str]]:
         """Create clinical note."""
-        if not permission_validator.validate('edit_medical_records'):
-            return False, None, "Permission denied"
-        
-        note_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
-        
-        note_data = {
-            'id': note_id,
+        return self.create(data)
+
+    def _build_row(self, data: Dict, now: str) -> Dict:
+        return {
+            'id': uuid4_str(),
             'client_id': data.get('client_id'),
             'reservation_id': data.get('reservation_id'),
             'doctor_id': data.get('doctor_id'),
@@ -38,31 +50,47 @@ class MedicalRecordsManager:
             'created_at': now,
             'updated_at': now
         }
-        
+
+    def create_clinical_notes_bulk(self, notes: List[Dict]) -> tuple[bool, List[str], Optional[str]]:
+        """Create many clinical notes in one batch.
+
+        For imports of historical notes: one Supabase insert and one
+        local transaction for the whole list instead of one per note.
+        """
+        if not permission_validator.validate('edit_medical_records'):
+            return False, [], "Permission denied"
+        if not notes:
+            return True, [], None
+
+        now = iso_now()
+        note_rows = [self._build_row(data, now) for data in notes]
+        note_ids = [row['id'] for row in note_rows]
+
         try:
             if network_monitor.is_online():
                 supabase_client = supabase_manager.client
-                response = supabase_client.table('clinical_notes').insert(note_data).execute()
-                if response.data:
-                    local_cache.insert('clinical_notes', note_data, mark_pending=False)
-                    return True, note_id, None
-                return False, None, "Failed to create clinical note"
+                supabase_client.table('clinical_notes').insert(note_rows, returning='minimal').execute()
+                local_cache.insert_many('clinical_notes', note_rows)
             else:
-                local_cache.insert('clinical_notes', note_data, mark_pending=True)
-                sync_queue.add_operation('clinical_notes', note_id, 'create', note_data)
-                return True, note_id, None
+                local_cache.insert_many('clinical_notes', note_rows, mark_pending=True)
+                sync_queue.add_operations([
+                    {'table_name': 'clinical_notes', 'record_id': row['id'],
+                     'operation': 'create', 'local_data': row}
+                    for row in note_rows
+                ])
+            return True, note_ids, None
         except Exception as e:
-            logger.error(f"Error creating clinical note: {e}")
-            return False, None, str(e)
-    
+            logger.error("Error creating clinical notes in bulk: %s", e)
+            return False, [], str(e)
+
     def create_dental_chart(self, data: Dict) -> tuple[bool, Optional[str], Optional[str]]:
         """Create dental chart."""
         if not permission_validator.validate('edit_medical_records'):
             return False, None, "Permission denied"
-        
-        chart_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
-        
+
+        chart_id = uuid4_str()
+        now = iso_now()
+
         chart_data = {
             'id': chart_id,
             'client_id': data.get('client_id'),
@@ -73,91 +101,40 @@ class MedicalRecordsManager:
             'created_at': now,
             'updated_at': now
         }
-        
+
         try:
             if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                response = supabase_client.table('dental_charts').insert(chart_data).execute()
-                if response.data:
-                    local_cache.insert('dental_charts', chart_data, mark_pending=False)
-                    return True, chart_id, None
-                return False, None, "Failed to create dental chart"
-            else:
+                # Optimistic: commit locally as pending and return at
+                # once; the Supabase round-trip runs off the UI thread
                 local_cache.insert('dental_charts', chart_data, mark_pending=True)
-                sync_queue.add_operation('dental_charts', chart_id, 'create', chart_data)
+
+                def _push():
+                    supabase_manager.client.table('dental_charts').insert(
+                        chart_data, returning='minimal').execute()
+
+                def _ok(_result):
+                    local_cache.mark_synced('dental_charts', chart_id)
+
+                def _err(exc):
+                    # Leave the row pending and queue it for the next
+                    # sync pass instead of losing the write
+                    logger.error("Background create for dental chart %s failed: %s", chart_id, exc)
+                    sync_queue.add_operation('dental_charts', chart_id, 'create', chart_data)
+                    network_monitor.mark_offline()
+
+                task_runner.submit(_push, on_ok=_ok, on_err=_err)
+                return True, chart_id, None
+            else:
+                local_cache.insert_with_pending('dental_charts', chart_data)
                 return True, chart_id, None
         except Exception as e:
-            logger.error(f"Error creating dental chart: {e}")
+            logger.error("Error creating dental chart: %s", e)
             return False, None, str(e)
-    
+
     def get_clinical_notes(self, client_id: str) -> List[Dict]:
         """Get clinical notes for a client."""
         return local_cache.query('clinical_notes', {'client_id': client_id})
-    
-    def list_all(self, limit: int = 100) -> List[Dict]:
-        """List all clinical notes."""
-        return local_cache.query('clinical_notes', limit=limit)
-    
-    def get(self, note_id: str) -> Optional[Dict]:
-        """Get clinical note by ID."""
-        return local_cache.get('clinical_notes', note_id)
-    
-    def update(self, note_id: str, data: Dict) -> tuple[bool, Optional[str]]:
-        """Update clinical note."""
-        if not permission_validator.validate('edit_medical_records'):
-            return False, "Permission denied"
-        
-        update_data = {
-            'updated_at': datetime.utcnow().isoformat()
-        }
-        
-        for key in ['client_id', 'reservation_id', 'doctor_id', 'visit_date_utc', 
-                   'chief_complaint', 'examination', 'diagnosis', 'treatment_rendered', 'notes']:
-            if key in data:
-                update_data[key] = data[key]
-        
-        try:
-            if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                response = supabase_client.table('clinical_notes').update(update_data).eq('id', note_id).execute()
-                if response.data:
-                    local_cache.update('clinical_notes', note_id, update_data, mark_pending=False)
-                    return True, None
-                return False, "Failed to update clinical note"
-            else:
-                existing = self.get(note_id)
-                if existing:
-                    merged_data = {**existing, **update_data}
-                    local_cache.update('clinical_notes', note_id, update_data, mark_pending=True)
-                    sync_queue.add_operation('clinical_notes', note_id, 'update', merged_data)
-                    return True, None
-                return False, "Clinical note not found"
-        except Exception as e:
-            logger.error(f"Error updating clinical note: {e}")
-            return False, str(e)
-    
-    def delete(self, note_id: str) -> tuple[bool, Optional[str]]:
-        """Delete clinical note."""
-        if not permission_validator.validate('edit_medical_records'):
-            return False, "Permission denied"
-        
-        try:
-            if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                response = supabase_client.table('clinical_notes').delete().eq('id', note_id).execute()
-                if response.data:
-                    local_cache.delete('clinical_notes', note_id, mark_pending=False)
-                    return True, None
-                return False, "Failed to delete clinical note"
-            else:
-                local_cache.delete('clinical_notes', note_id, mark_pending=True)
-                sync_queue.add_operation('clinical_notes', note_id, 'delete', {})
-                return True, None
-        except Exception as e:
-            logger.error(f"Error deleting clinical note: {e}")
-            return False, str(e)
 
 
 # Global instance
 medical_records_manager = MedicalRecordsManager()
-
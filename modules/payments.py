@@ -1,17 +1,39 @@
 """Payment processing module with reconciliation."""
 
 import logging
-import uuid
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import Iterator, List, Dict, Optional
 from database.supabase_client import supabase_manager
 from database.local_cache import local_cache
 from database.sync_queue import sync_queue
 from utils.network_monitor import network_monitor
 from auth.permission_validator import permission_validator
+from modules._crud import push_background
+from utils.fast_uuid import uuid4_str
+from utils.now import iso_now
 
 logger = logging.getLogger(__name__)
 
+_PAYMENT_UPDATE_KEYS = frozenset({
+    'amount', 'payment_method', 'payment_date_utc', 'status', 'notes'
+})
+
+# Row skeleton copied per create: the copy arrives presized with every
+# key, so the per-call fills never grow or rehash the dict.
+_PAYMENT_TEMPLATE = {
+    'id': '',
+    'reservation_id': None,
+    'client_id': None,
+    'amount': 0.0,
+    'payment_method': 'cash',
+    'payment_date_utc': '',
+    'status': 'pending',
+    'notes': '',
+    'processed_by': '',
+    'created_at': '',
+    'updated_at': '',
+    'last_modified_by': ''
+}
+
 
 class PaymentManager:
     """Manages payment operations."""
@@ -21,40 +43,39 @@ class PaymentManager:
         if not permission_validator.validate('process_payments'):
             return False, None, "Permission denied"
         
-        payment_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
+        payment_id = uuid4_str()
+        now = iso_now()
         
-        payment_data = {
-            'id': payment_id,
-            'reservation_id': data.get('reservation_id'),
-            'client_id': data.get('client_id'),
-            'amount': data.get('amount', 0.0),
-            'payment_method': data.get('payment_method', 'cash'),
-            'payment_date_utc': data.get('payment_date_utc', now),
-            'status': data.get('status', 'pending'),
-            'notes': data.get('notes', ''),
-            'processed_by': data.get('processed_by', ''),
-            'created_at': now,
-            'updated_at': now,
-            'last_modified_by': data.get('processed_by', '')
-        }
+        payment_data = _PAYMENT_TEMPLATE.copy()
+        payment_data['id'] = payment_id
+        payment_data['reservation_id'] = data.get('reservation_id')
+        payment_data['client_id'] = data.get('client_id')
+        payment_data['amount'] = data.get('amount', 0.0)
+        payment_data['payment_method'] = data.get('payment_method', 'cash')
+        payment_data['payment_date_utc'] = data.get('payment_date_utc', now)
+        payment_data['status'] = data.get('status', 'pending')
+        payment_data['notes'] = data.get('notes', '')
+        payment_data['processed_by'] = data.get('processed_by', '')
+        payment_data['created_at'] = now
+        payment_data['updated_at'] = now
+        payment_data['last_modified_by'] = data.get('processed_by', '')
         
         try:
             if network_monitor.is_online():
-                # Check for duplicates before creating
+                # Check for duplicates before creating; this probe is
+                # the only remote round-trip left on the caller's thread
                 if self._check_duplicate(payment_data):
                     return False, None, "Duplicate payment detected"
-                
-                supabase_client = supabase_manager.client
-                response = supabase_client.table('payments').insert(payment_data).execute()
-                if response.data:
-                    local_cache.insert('payments', payment_data, mark_pending=False)
-                    logger.info(f"Payment {payment_id} created")
-                    return True, payment_id, None
-                return False, None, "Failed to create payment"
-            else:
+
+                # Optimistic: commit locally as pending and return at
+                # once; the Supabase insert runs off the UI thread
                 local_cache.insert('payments', payment_data, mark_pending=True)
-                sync_queue.add_operation('payments', payment_id, 'create', payment_data)
+                push_background('payments', 'payment', payment_id, 'create', payment_data)
+                logger.info(f"Payment {payment_id} created")
+                return True, payment_id, None
+            else:
+                # One commit for the row and its queue entry
+                local_cache.insert_with_pending('payments', payment_data)
                 logger.info(f"Payment {payment_id} created offline")
                 return True, payment_id, None
         except Exception as e:
@@ -70,26 +91,23 @@ class PaymentManager:
             
             if not all([reservation_id, amount, payment_date]):
                 return False
-            
-            # Check local cache
-            local_payments = local_cache.query('payments', {
+
+            # Date equality lives in the query, so the local probe is
+            # one indexed lookup (idx_payments_dup) instead of a scan
+            # and Python loop over every matching payment
+            if local_cache.query('payments', {
                 'reservation_id': reservation_id,
-                'amount': amount
-            })
-            
-            for payment in local_payments:
-                if payment.get('payment_date_utc') == payment_date:
-                    return True
-            
-            # Check Supabase
+                'amount': amount,
+                'payment_date_utc': payment_date
+            }, limit=1):
+                return True
+
+            # Remote probe only asks for one id, not full rows
             supabase_client = supabase_manager.client
-            response = supabase_client.table('payments').select('*').eq('reservation_id', reservation_id).eq('amount', amount).execute()
-            
-            for payment in response.data:
-                if payment.get('payment_date_utc') == payment_date:
-                    return True
-            
-            return False
+            response = supabase_client.table('payments').select('id') \
+                .eq('reservation_id', reservation_id).eq('amount', amount) \
+                .eq('payment_date_utc', payment_date).limit(1).execute()
+            return bool(response.data)
         except Exception as e:
             logger.error(f"Error checking duplicate: {e}")
             return False
@@ -100,30 +118,28 @@ class PaymentManager:
             return False, "Permission denied"
         
         update_data = {
-            'updated_at': datetime.utcnow().isoformat(),
+            'updated_at': iso_now(),
             'last_modified_by': data.get('last_modified_by', '')
         }
         
-        for key in ['amount', 'payment_method', 'payment_date_utc', 'status', 'notes']:
-            if key in data:
-                update_data[key] = data[key]
+        update_data.update({key: data[key] for key in data.keys() & _PAYMENT_UPDATE_KEYS})
         
         try:
+            # UPDATE..RETURNING doubles as the existence check; copy
+            # the payload first because the local write adds its
+            # sync-tracking columns to the dict
+            payload = dict(update_data)
+            merged = local_cache.update_returning('payments', payment_id, update_data)
+            if not merged:
+                return False, "Payment not found"
             if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                response = supabase_client.table('payments').update(update_data).eq('id', payment_id).execute()
-                if response.data:
-                    local_cache.update('payments', payment_id, update_data, mark_pending=False)
-                    return True, None
-                return False, "Failed to update payment"
+                # Optimistic: the remote update runs off the UI thread
+                push_background('payments', 'payment', payment_id, 'update', payload)
             else:
-                existing = self.get(payment_id)
-                if existing:
-                    merged_data = {**existing, **update_data}
-                    local_cache.update('payments', payment_id, update_data, mark_pending=True)
-                    sync_queue.add_operation('payments', payment_id, 'update', merged_data)
-                    return True, None
-                return False, "Payment not found"
+                # Payload-free: the sync worker reads the current row
+                # at flush time
+                sync_queue.add_operation_ref('payments', payment_id, 'update')
+            return True, None
         except Exception as e:
             logger.error(f"Error updating payment: {e}")
             return False, str(e)
@@ -143,6 +159,10 @@ class PaymentManager:
     def list_all(self, limit: int = 100) -> List[Dict]:
         """List all payments."""
         return local_cache.query('payments', limit=limit)
+
+    def list_all_iter(self, batch: int = 500) -> Iterator:
+        """Stream all payments in stable (created_at, id) order."""
+        return local_cache.iter_keyset('payments', batch=batch)
     
     def delete(self, payment_id: str) -> tuple[bool, Optional[str]]:
         """Delete payment."""
@@ -150,17 +170,13 @@ class PaymentManager:
             return False, "Permission denied"
         
         try:
+            local_cache.delete('payments', payment_id, mark_pending=False)
             if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                response = supabase_client.table('payments').delete().eq('id', payment_id).execute()
-                if response.data:
-                    local_cache.delete('payments', payment_id, mark_pending=False)
-                    return True, None
-                return False, "Failed to delete payment"
+                # Optimistic: the remote delete runs off the UI thread
+                push_background('payments', 'payment', payment_id, 'delete')
             else:
-                local_cache.delete('payments', payment_id, mark_pending=True)
                 sync_queue.add_operation('payments', payment_id, 'delete', {})
-                return True, None
+            return True, None
         except Exception as e:
             logger.error(f"Error deleting payment: {e}")
             return False, str(e)
@@ -1,17 +1,50 @@
 """Prescription management module."""
 
 import logging
-import uuid
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import Iterator, List, Dict, Optional
 from database.supabase_client import supabase_manager
 from database.local_cache import local_cache
 from database.sync_queue import sync_queue
 from utils.network_monitor import network_monitor
 from auth.permission_validator import permission_validator
+from modules._crud import push_background
+from utils.fast_uuid import uuid4_str
+from utils.now import iso_now
+from utils.task_runner import task_runner
 
 logger = logging.getLogger(__name__)
 
+_PRESCRIPTION_UPDATE_KEYS = frozenset({
+    'client_id', 'doctor_id', 'reservation_id', 'prescription_date_utc',
+    'status', 'notes'
+})
+
+# Row skeletons copied per create: the copy arrives presized with every
+# key, so the per-call fills never grow or rehash the dict. The item
+# template matters most - it is copied once per medication.
+_PRESCRIPTION_TEMPLATE = {
+    'id': '',
+    'client_id': None,
+    'doctor_id': None,
+    'reservation_id': None,
+    'prescription_date_utc': '',
+    'status': 'active',
+    'notes': '',
+    'created_at': '',
+    'updated_at': ''
+}
+
+_ITEM_TEMPLATE = {
+    'id': '',
+    'prescription_id': '',
+    'medication_name': '',
+    'dosage': '',
+    'frequency': '',
+    'duration': '',
+    'instructions': '',
+    'created_at': ''
+}
+
 
 class PrescriptionManager:
     """Manages prescriptions."""
@@ -21,56 +54,98 @@ class PrescriptionManager:
         if not permission_validator.validate('create_prescriptions'):
             return False, None, "Permission denied"
         
-        prescription_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
+        prescription_id = uuid4_str()
+        now = iso_now()
         
-        prescription_data = {
-            'id': prescription_id,
-            'client_id': data.get('client_id'),
-            'doctor_id': data.get('doctor_id'),
-            'reservation_id': data.get('reservation_id'),
-            'prescription_date_utc': data.get('prescription_date_utc', now),
-            'status': data.get('status', 'active'),
-            'notes': data.get('notes', ''),
-            'created_at': now,
-            'updated_at': now
-        }
+        prescription_data = _PRESCRIPTION_TEMPLATE.copy()
+        prescription_data['id'] = prescription_id
+        prescription_data['client_id'] = data.get('client_id')
+        prescription_data['doctor_id'] = data.get('doctor_id')
+        prescription_data['reservation_id'] = data.get('reservation_id')
+        prescription_data['prescription_date_utc'] = data.get('prescription_date_utc', now)
+        prescription_data['status'] = data.get('status', 'active')
+        prescription_data['notes'] = data.get('notes', '')
+        prescription_data['created_at'] = now
+        prescription_data['updated_at'] = now
         
         try:
             if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                response = supabase_client.table('prescriptions').insert(prescription_data).execute()
-                if response.data:
-                    local_cache.insert('prescriptions', prescription_data, mark_pending=False)
-                    # Add prescription items
-                    items = data.get('items', [])
-                    for item in items:
-                        self.add_prescription_item(prescription_id, item)
-                    return True, prescription_id, None
-                return False, None, "Failed to create prescription"
+                item_rows = [self._build_item(prescription_id, item, now)
+                             for item in data.get('items', [])]
+                # Optimistic: commit locally as pending and return at
+                # once; both Supabase inserts (one batched call for all
+                # items) run off the UI thread
+                with local_cache.transaction():
+                    local_cache.insert('prescriptions', prescription_data, mark_pending=True)
+                    if item_rows:
+                        local_cache.insert_many('prescription_items', item_rows, mark_pending=True)
+
+                def _push():
+                    client = supabase_manager.client
+                    client.table('prescriptions').insert(
+                        prescription_data, returning='minimal').execute()
+                    if item_rows:
+                        client.table('prescription_items').insert(
+                            item_rows, returning='minimal').execute()
+
+                def _ok(_result):
+                    local_cache.mark_synced('prescriptions', prescription_id)
+                    for row in item_rows:
+                        local_cache.mark_synced('prescription_items', row['id'])
+
+                def _err(exc):
+                    # Leave the rows pending and queue them for the
+                    # next sync pass instead of losing the write
+                    logger.error("Background create for prescription %s failed: %s",
+                                 prescription_id, exc)
+                    sync_queue.add_operation('prescriptions', prescription_id, 'create', prescription_data)
+                    sync_queue.add_operations([
+                        {'table_name': 'prescription_items', 'record_id': row['id'],
+                         'operation': 'create', 'local_data': row}
+                        for row in item_rows
+                    ])
+                    network_monitor.mark_offline()
+
+                task_runner.submit(_push, on_ok=_ok, on_err=_err)
+                return True, prescription_id, None
             else:
-                local_cache.insert('prescriptions', prescription_data, mark_pending=True)
-                sync_queue.add_operation('prescriptions', prescription_id, 'create', prescription_data)
+                item_rows = [self._build_item(prescription_id, item, now)
+                             for item in data.get('items', [])]
+                # Single commit (one fsync) for the prescription, its
+                # items and all their queue entries
+                with local_cache.transaction():
+                    local_cache.insert('prescriptions', prescription_data, mark_pending=True)
+                    if item_rows:
+                        local_cache.insert_many('prescription_items', item_rows, mark_pending=True)
+                    sync_queue.add_operation('prescriptions', prescription_id, 'create', prescription_data)
+                    sync_queue.add_operations([
+                        {'table_name': 'prescription_items', 'record_id': row['id'],
+                         'operation': 'create', 'local_data': row}
+                        for row in item_rows
+                    ])
                 return True, prescription_id, None
         except Exception as e:
             logger.error(f"Error creating prescription: {e}")
             return False, None, str(e)
-    
+
+    def _build_item(self, prescription_id: str, item_data: Dict, now: Optional[str] = None) -> Dict:
+        """Build a prescription_items row from raw item data."""
+        item = _ITEM_TEMPLATE.copy()
+        item['id'] = uuid4_str()
+        item['prescription_id'] = prescription_id
+        item['medication_name'] = item_data.get('medication_name', '')
+        item['dosage'] = item_data.get('dosage', '')
+        item['frequency'] = item_data.get('frequency', '')
+        item['duration'] = item_data.get('duration', '')
+        item['instructions'] = item_data.get('instructions', '')
+        item['created_at'] = now or iso_now()
+        return item
+
     def add_prescription_item(self, prescription_id: str, item_data: Dict) -> tuple[bool, Optional[str]]:
         """Add item to prescription."""
-        item_id = str(uuid.uuid4())
-        
-        item = {
-            'id': item_id,
-            'prescription_id': prescription_id,
-            'medication_name': item_data.get('medication_name', ''),
-            'dosage': item_data.get('dosage', ''),
-            'frequency': item_data.get('frequency', ''),
-            'duration': item_data.get('duration', ''),
-            'instructions': item_data.get('instructions', ''),
-            'created_at': datetime.utcnow().isoformat()
-        }
-        
+        item = self._build_item(prescription_id, item_data)
+        item_id = item['id']
+
         try:
             if network_monitor.is_online():
                 supabase_client = supabase_manager.client
@@ -98,6 +173,10 @@ class PrescriptionManager:
     def list_all(self, limit: int = 100) -> List[Dict]:
         """List all prescriptions."""
         return local_cache.query('prescriptions', limit=limit)
+
+    def list_all_iter(self, batch: int = 500) -> Iterator:
+        """Stream all prescriptions in stable (created_at, id) order."""
+        return local_cache.iter_keyset('prescriptions', batch=batch)
     
     def update(self, prescription_id: str, data: Dict) -> tuple[bool, Optional[str]]:
         """Update prescription."""
@@ -105,29 +184,27 @@ class PrescriptionManager:
             return False, "Permission denied"
         
         update_data = {
-            'updated_at': datetime.utcnow().isoformat()
+            'updated_at': iso_now()
         }
         
-        for key in ['client_id', 'doctor_id', 'reservation_id', 'prescription_date_utc', 'status', 'notes']:
-            if key in data:
-                update_data[key] = data[key]
+        update_data.update({key: data[key] for key in data.keys() & _PRESCRIPTION_UPDATE_KEYS})
         
         try:
+            # UPDATE..RETURNING doubles as the existence check; copy
+            # the payload first because the local write adds its
+            # sync-tracking columns to the dict
+            payload = dict(update_data)
+            merged = local_cache.update_returning('prescriptions', prescription_id, update_data)
+            if not merged:
+                return False, "Prescription not found"
             if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                response = supabase_client.table('prescriptions').update(update_data).eq('id', prescription_id).execute()
-                if response.data:
-                    local_cache.update('prescriptions', prescription_id, update_data, mark_pending=False)
-                    return True, None
-                return False, "Failed to update prescription"
+                # Optimistic: the remote update runs off the UI thread
+                push_background('prescriptions', 'prescription', prescription_id, 'update', payload)
             else:
-                existing = self.get_prescription(prescription_id)
-                if existing:
-                    merged_data = {**existing, **update_data}
-                    local_cache.update('prescriptions', prescription_id, update_data, mark_pending=True)
-                    sync_queue.add_operation('prescriptions', prescription_id, 'update', merged_data)
-                    return True, None
-                return False, "Prescription not found"
+                # Payload-free: the sync worker reads the current row
+                # at flush time
+                sync_queue.add_operation_ref('prescriptions', prescription_id, 'update')
+            return True, None
         except Exception as e:
             logger.error(f"Error updating prescription: {e}")
             return False, str(e)
@@ -138,20 +215,17 @@ class PrescriptionManager:
             return False, "Permission denied"
         
         try:
+            # Local children go in the same transaction; the remote
+            # cascade (database/add_prescription_cascade.sql) cleans
+            # theirs from the single parent delete
+            local_cache.delete_with_children('prescriptions', prescription_id,
+                                             {'prescription_items': 'prescription_id'})
             if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                # Delete prescription items first
-                supabase_client.table('prescription_items').delete().eq('prescription_id', prescription_id).execute()
-                # Delete prescription
-                response = supabase_client.table('prescriptions').delete().eq('id', prescription_id).execute()
-                if response.data:
-                    local_cache.delete('prescriptions', prescription_id, mark_pending=False)
-                    return True, None
-                return False, "Failed to delete prescription"
+                # Optimistic: the remote delete runs off the UI thread
+                push_background('prescriptions', 'prescription', prescription_id, 'delete')
             else:
-                local_cache.delete('prescriptions', prescription_id, mark_pending=True)
                 sync_queue.add_operation('prescriptions', prescription_id, 'delete', {})
-                return True, None
+            return True, None
         except Exception as e:
             logger.error(f"Error deleting prescription: {e}")
             return False, str(e)
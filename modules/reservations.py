@@ -1,17 +1,42 @@
 """Appointment/reservation management module with locking."""
 
 import logging
-import uuid
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
+from typing import Iterator, List, Dict, Optional
 from database.supabase_client import supabase_manager
 from database.local_cache import local_cache
 from database.sync_queue import sync_queue
 from utils.network_monitor import network_monitor
 from auth.permission_validator import permission_validator
+from modules._crud import push_background
+from utils.fast_uuid import uuid4_str
+from utils.now import iso_now, iso_in
 
 logger = logging.getLogger(__name__)
 
+_RESERVATION_UPDATE_KEYS = frozenset({
+    'client_id', 'doctor_id', 'room_id', 'reservation_date',
+    'start_time_utc', 'end_time_utc', 'status', 'notes'
+})
+
+# Row skeleton copied per create: the copy arrives presized with every
+# key, so the per-call fills never grow or rehash the dict.
+_RESERVATION_TEMPLATE = {
+    'id': '',
+    'client_id': None,
+    'doctor_id': None,
+    'room_id': None,
+    'reservation_date': None,
+    'start_time_utc': None,
+    'end_time_utc': None,
+    'status': 'scheduled',
+    'notes': '',
+    'locked_until': '',
+    'created_at': '',
+    'updated_at': '',
+    'created_by': '',
+    'last_modified_by': ''
+}
+
 
 class ReservationManager:
     """Manages appointment/reservation operations."""
@@ -32,40 +57,38 @@ class ReservationManager:
         if not availability['available']:
             return False, None, availability.get('reason', 'Time slot not available')
         
-        reservation_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
+        reservation_id = uuid4_str()
+        now = iso_now()
         
-        reservation_data = {
-            'id': reservation_id,
-            'client_id': data.get('client_id'),
-            'doctor_id': data.get('doctor_id'),
-            'room_id': data.get('room_id'),
-            'reservation_date': data.get('reservation_date'),
-            'start_time_utc': data.get('start_time_utc'),
-            'end_time_utc': data.get('end_time_utc'),
-            'status': data.get('status', 'scheduled'),
-            'notes': data.get('notes', ''),
-            'locked_until': (datetime.utcnow() + timedelta(minutes=5)).isoformat(),
-            'created_at': now,
-            'updated_at': now,
-            'created_by': data.get('created_by', ''),
-            'last_modified_by': data.get('created_by', '')
-        }
+        reservation_data = _RESERVATION_TEMPLATE.copy()
+        reservation_data['id'] = reservation_id
+        reservation_data['client_id'] = data.get('client_id')
+        reservation_data['doctor_id'] = data.get('doctor_id')
+        reservation_data['room_id'] = data.get('room_id')
+        reservation_data['reservation_date'] = data.get('reservation_date')
+        reservation_data['start_time_utc'] = data.get('start_time_utc')
+        reservation_data['end_time_utc'] = data.get('end_time_utc')
+        reservation_data['status'] = data.get('status', 'scheduled')
+        reservation_data['notes'] = data.get('notes', '')
+        reservation_data['locked_until'] = iso_in(300)
+        reservation_data['created_at'] = now
+        reservation_data['updated_at'] = now
+        reservation_data['created_by'] = data.get('created_by', '')
+        reservation_data['last_modified_by'] = data.get('created_by', '')
         
         try:
             if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                response = supabase_client.table('reservations').insert(reservation_data).execute()
-                
-                if response.data:
-                    local_cache.insert('reservations', reservation_data, mark_pending=False)
-                    logger.info(f"Reservation {reservation_id} created")
-                    return True, reservation_id, None
-                else:
-                    return False, None, "Failed to create reservation"
-            else:
+                # Optimistic: availability was already checked against
+                # both stores, so commit locally as pending and return
+                # at once; the Supabase insert runs off the UI thread
                 local_cache.insert('reservations', reservation_data, mark_pending=True)
-                sync_queue.add_operation('reservations', reservation_id, 'create', reservation_data)
+                push_background('reservations', 'reservation', reservation_id, 'create',
+                                reservation_data)
+                logger.info(f"Reservation {reservation_id} created")
+                return True, reservation_id, None
+            else:
+                # One commit for the row and its queue entry
+                local_cache.insert_with_pending('reservations', reservation_data)
                 logger.info(f"Reservation {reservation_id} created offline")
                 return True, reservation_id, None
         
@@ -77,15 +100,20 @@ class ReservationManager:
                          start_time_utc: str, end_time_utc: str) -> Dict:
         """Check if doctor and room are available."""
         try:
+            # One connectivity answer for both conflict checks
+            online = network_monitor.is_online()
+
             # Check doctor availability
             if doctor_id:
-                doctor_conflicts = self._check_conflicts('doctor_id', doctor_id, start_time_utc, end_time_utc)
+                doctor_conflicts = self._check_conflicts('doctor_id', doctor_id, start_time_utc, end_time_utc,
+                                                         online=online)
                 if doctor_conflicts:
                     return {'available': False, 'reason': 'Doctor not available at this time'}
-            
+
             # Check room availability
             if room_id:
-                room_conflicts = self._check_conflicts('room_id', room_id, start_time_utc, end_time_utc)
+                room_conflicts = self._check_conflicts('room_id', room_id, start_time_utc, end_time_utc,
+                                                       online=online)
                 if room_conflicts:
                     return {'available': False, 'reason': 'Room not available at this time'}
             
@@ -96,44 +124,35 @@ class ReservationManager:
             return {'available': False, 'reason': str(e)}
     
     def _check_conflicts(self, field: str, value: str, start_time_utc: str, end_time_utc: str,
-                        exclude_id: Optional[str] = None) -> List[Dict]:
-        """Check for time conflicts."""
-        conflicts = []
-        
-        # Check local cache
-        all_reservations = local_cache.query('reservations', {field: value})
-        
-        for res in all_reservations:
-            if exclude_id and res['id'] == exclude_id:
-                continue
-            
-            res_start = res.get('start_time_utc')
-            res_end = res.get('end_time_utc')
-            
-            if res_start and res_end:
-                # Check for overlap
-                if not (end_time_utc <= res_start or start_time_utc >= res_end):
-                    conflicts.append(res)
-        
+                        exclude_id: Optional[str] = None, online: Optional[bool] = None) -> List[Dict]:
+        """Check for time conflicts.
+
+        Callers that already know the connectivity status pass it in as
+        `online` so back-to-back checks share one answer.
+        """
+        # Overlap predicate runs in SQL against the composite
+        # (field, start, end) index; no full-calendar fetch
+        conflicts = local_cache.find_conflicts(field, value, start_time_utc,
+                                               end_time_utc, exclude_id)
+
         # Check Supabase if online
-        if network_monitor.is_online():
+        if online is None:
+            online = network_monitor.is_online()
+        if online:
             try:
                 supabase_client = supabase_manager.client
-                response = supabase_client.table('reservations').select('*').eq(field, value).execute()
-                
-                for res in response.data:
-                    if exclude_id and res['id'] == exclude_id:
-                        continue
-                    
-                    res_start = res.get('start_time_utc')
-                    res_end = res.get('end_time_utc')
-                    
-                    if res_start and res_end:
-                        if not (end_time_utc <= res_start or start_time_utc >= res_end):
-                            conflicts.append(res)
+                # Callers only test for overlap, so skip the notes and
+                # bookkeeping columns a full row would drag over HTTPS
+                query = supabase_client.table('reservations').select('id,start_time_utc,end_time_utc') \
+                    .eq(field, value) \
+                    .lt('start_time_utc', end_time_utc) \
+                    .gt('end_time_utc', start_time_utc)
+                if exclude_id:
+                    query = query.neq('id', exclude_id)
+                conflicts.extend(query.execute().data)
             except Exception as e:
                 logger.error(f"Error checking Supabase conflicts: {e}")
-        
+
         return conflicts
     
     def update(self, reservation_id: str, data: Dict) -> tuple[bool, Optional[str]]:
@@ -161,31 +180,27 @@ class ReservationManager:
                 return False, availability.get('reason', 'Time slot not available')
         
         update_data = {
-            'updated_at': datetime.utcnow().isoformat(),
+            'updated_at': iso_now(),
             'last_modified_by': data.get('last_modified_by', '')
         }
         
-        for key in ['client_id', 'doctor_id', 'room_id', 'reservation_date',
-                    'start_time_utc', 'end_time_utc', 'status', 'notes']:
-            if key in data:
-                update_data[key] = data[key]
+        update_data.update({key: data[key] for key in data.keys() & _RESERVATION_UPDATE_KEYS})
         
         try:
+            # Existence was checked above; copy the payload first
+            # because the local write adds its sync-tracking columns
+            # to the dict
+            payload = dict(update_data)
+            local_cache.update('reservations', reservation_id, update_data, mark_pending=True)
             if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                response = supabase_client.table('reservations').update(update_data).eq('id', reservation_id).execute()
-                
-                if response.data:
-                    local_cache.update('reservations', reservation_id, update_data, mark_pending=False)
-                    return True, None
-                else:
-                    return False, "Failed to update reservation"
+                # Optimistic: the remote update runs off the UI thread
+                push_background('reservations', 'reservation', reservation_id, 'update', payload)
             else:
-                merged_data = {**existing, **update_data}
-                local_cache.update('reservations', reservation_id, update_data, mark_pending=True)
-                sync_queue.add_operation('reservations', reservation_id, 'update', merged_data)
-                return True, None
-        
+                # Payload-free: the sync worker reads the current row
+                # at flush time
+                sync_queue.add_operation_ref('reservations', reservation_id, 'update')
+            return True, None
+
         except Exception as e:
             logger.error(f"Error updating reservation: {e}")
             return False, str(e)
@@ -196,16 +211,14 @@ class ReservationManager:
             return False, "Permission denied"
         
         try:
+            local_cache.delete('reservations', reservation_id, mark_pending=False)
             if network_monitor.is_online():
-                supabase_client = supabase_manager.client
-                supabase_client.table('reservations').delete().eq('id', reservation_id).execute()
-                local_cache.delete('reservations', reservation_id, mark_pending=False)
-                return True, None
+                # Optimistic: the remote delete runs off the UI thread
+                push_background('reservations', 'reservation', reservation_id, 'delete')
             else:
-                local_cache.delete('reservations', reservation_id, mark_pending=True)
                 sync_queue.add_operation('reservations', reservation_id, 'delete')
-                return True, None
-        
+            return True, None
+
         except Exception as e:
             logger.error(f"Error deleting reservation: {e}")
             return False, str(e)
@@ -247,9 +260,15 @@ class ReservationManager:
         """List all reservations."""
         if not permission_validator.validate('view_appointments'):
             return []
-        
+
         return local_cache.query('reservations', limit=limit)
 
+    def list_all_iter(self, batch: int = 500) -> Iterator:
+        """Stream all reservations in stable (created_at, id) order."""
+        if not permission_validator.validate('view_appointments'):
+            return iter(())
+        return local_cache.iter_keyset('reservations', batch=batch)
+
 
 # Global instance
 reservation_manager = ReservationManager()
@@ -1,17 +1,21 @@
 """Staff management module."""
 
 import logging
-import uuid
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import Iterator, List, Dict, Optional
 from database.supabase_client import supabase_manager
 from database.local_cache import local_cache
 from database.sync_queue import sync_queue
 from utils.network_monitor import network_monitor
 from auth.permission_validator import permission_validator
+from utils.fast_uuid import uuid4_str
+from utils.now import iso_now
 
 logger = logging.getLogger(__name__)
 
+_STAFF_UPDATE_KEYS = frozenset({
+    'user_id', 'position', 'hire_date', 'is_active'
+})
+
 
 class StaffManager:
     """Manages staff operations."""
@@ -21,8 +25,8 @@ class StaffManager:
         if not permission_validator.validate('manage_users'):
             return False, None, "Permission denied"
         
-        staff_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
+        staff_id = uuid4_str()
+        now = iso_now()
         
         staff_data = {
             'id': staff_id,
@@ -44,8 +48,8 @@ class StaffManager:
                     return True, staff_id, None
                 return False, None, "Failed to create staff"
             else:
-                local_cache.insert('staff', staff_data, mark_pending=True)
-                sync_queue.add_operation('staff', staff_id, 'create', staff_data)
+                # One commit for the row and its queue entry
+                local_cache.insert_with_pending('staff', staff_data)
                 return True, staff_id, None
         except Exception as e:
             logger.error(f"Error creating staff: {e}")
@@ -57,13 +61,11 @@ class StaffManager:
             return False, "Permission denied"
         
         update_data = {
-            'updated_at': datetime.utcnow().isoformat(),
+            'updated_at': iso_now(),
             'last_modified_by': data.get('last_modified_by', '')
         }
         
-        for key in ['user_id', 'position', 'hire_date', 'is_active']:
-            if key in data:
-                update_data[key] = data[key]
+        update_data.update({key: data[key] for key in data.keys() & _STAFF_UPDATE_KEYS})
         
         try:
             if network_monitor.is_online():
@@ -74,11 +76,12 @@ class StaffManager:
                     return True, None
                 return False, "Failed to update staff"
             else:
-                existing = self.get(staff_id)
-                if existing:
-                    merged_data = {**existing, **update_data}
-                    local_cache.update('staff', staff_id, update_data, mark_pending=True)
-                    sync_queue.add_operation('staff', staff_id, 'update', merged_data)
+                # UPDATE..RETURNING doubles as the existence check; the
+                # queue entry is payload-free - the sync worker reads
+                # the current row at flush time
+                merged = local_cache.update_returning('staff', staff_id, update_data)
+                if merged:
+                    sync_queue.add_operation_ref('staff', staff_id, 'update')
                     return True, None
                 return False, "Staff not found"
         except Exception as e:
@@ -96,6 +99,11 @@ class StaffManager:
             filters['is_active'] = 1
         return local_cache.query('staff', filters)
 
+    def list_all_iter(self, active_only: bool = True, batch: int = 500) -> Iterator:
+        """Stream staff in stable (created_at, id) order."""
+        filters = {'is_active': 1} if active_only else None
+        return local_cache.iter_keyset('staff', filters, batch=batch)
+
 
 # Global instance
 staff_manager = StaffManager()
@@ -1,17 +1,22 @@
 """Treatment planning and procedures module."""
 
 import logging
-import uuid
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import Iterator, List, Dict, Optional
 from database.supabase_client import supabase_manager
 from database.local_cache import local_cache
 from database.sync_queue import sync_queue
 from utils.network_monitor import network_monitor
 from auth.permission_validator import permission_validator
+from utils.fast_uuid import uuid4_str
+from utils.now import iso_now
 
 logger = logging.getLogger(__name__)
 
+_PLAN_UPDATE_KEYS = frozenset({
+    'plan_name', 'status', 'total_cost', 'start_date', 'completion_date',
+    'notes'
+})
+
 
 class TreatmentPlanManager:
     """Manages treatment plans and procedures."""
@@ -21,8 +26,8 @@ class TreatmentPlanManager:
         if not permission_validator.validate('manage_settings'):
             return False, None, "Permission denied"
         
-        procedure_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
+        procedure_id = uuid4_str()
+        now = iso_now()
         
         procedure_data = {
             'id': procedure_id,
@@ -46,8 +51,8 @@ class TreatmentPlanManager:
                     return True, procedure_id, None
                 return False, None, "Failed to create procedure"
             else:
-                local_cache.insert('procedure_catalog', procedure_data, mark_pending=True)
-                sync_queue.add_operation('procedure_catalog', procedure_id, 'create', procedure_data)
+                # One commit for the row and its queue entry
+                local_cache.insert_with_pending('procedure_catalog', procedure_data)
                 return True, procedure_id, None
         except Exception as e:
             logger.error(f"Error creating procedure: {e}")
@@ -58,8 +63,8 @@ class TreatmentPlanManager:
         if not permission_validator.validate('create_treatment_plans'):
             return False, None, "Permission denied"
         
-        plan_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
+        plan_id = uuid4_str()
+        now = iso_now()
         
         plan_data = {
             'id': plan_id,
@@ -90,8 +95,8 @@ class TreatmentPlanManager:
                     return True, plan_id, None
                 return False, None, "Failed to create treatment plan"
             else:
-                local_cache.insert('treatment_plans', plan_data, mark_pending=True)
-                sync_queue.add_operation('treatment_plans', plan_id, 'create', plan_data)
+                # One commit for the row and its queue entry
+                local_cache.insert_with_pending('treatment_plans', plan_data)
                 return True, plan_id, None
         except Exception as e:
             logger.error(f"Error creating treatment plan: {e}")
@@ -99,8 +104,8 @@ class TreatmentPlanManager:
     
     def add_plan_item(self, plan_id: str, item_data: Dict) -> tuple[bool, Optional[str]]:
         """Add item to treatment plan."""
-        item_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
+        item_id = uuid4_str()
+        now = iso_now()
         
         item = {
             'id': item_id,
@@ -124,8 +129,8 @@ class TreatmentPlanManager:
                     return True, item_id
                 return False, "Failed to add plan item"
             else:
-                local_cache.insert('treatment_plan_items', item, mark_pending=True)
-                sync_queue.add_operation('treatment_plan_items', item_id, 'create', item)
+                # One commit for the row and its queue entry
+                local_cache.insert_with_pending('treatment_plan_items', item)
                 return True, item_id
         except Exception as e:
             logger.error(f"Error adding plan item: {e}")
@@ -149,6 +154,10 @@ class TreatmentPlanManager:
     def list_all(self, limit: int = 100) -> List[Dict]:
         """List all treatment plans."""
         return local_cache.query('treatment_plans', limit=limit)
+
+    def list_all_iter(self, batch: int = 500) -> Iterator:
+        """Stream all treatment plans in stable (created_at, id) order."""
+        return local_cache.iter_keyset('treatment_plans', batch=batch)
     
     def update(self, plan_id: str, data: Dict) -> tuple[bool, Optional[str]]:
         """Update treatment plan."""
@@ -156,13 +165,11 @@ class TreatmentPlanManager:
             return False, "Permission denied"
         
         update_data = {
-            'updated_at': datetime.utcnow().isoformat(),
+            'updated_at': iso_now(),
             'last_modified_by': data.get('last_modified_by', '')
         }
         
-        for key in ['plan_name', 'status', 'total_cost', 'start_date', 'completion_date', 'notes']:
-            if key in data:
-                update_data[key] = data[key]
+        update_data.update({key: data[key] for key in data.keys() & _PLAN_UPDATE_KEYS})
         
         try:
             if network_monitor.is_online():
@@ -173,11 +180,12 @@ class TreatmentPlanManager:
                     return True, None
                 return False, "Failed to update treatment plan"
             else:
-                existing = self.get_treatment_plan(plan_id)
-                if existing:
-                    merged_data = {**existing, **update_data}
-                    local_cache.update('treatment_plans', plan_id, update_data, mark_pending=True)
-                    sync_queue.add_operation('treatment_plans', plan_id, 'update', merged_data)
+                # UPDATE..RETURNING doubles as the existence check; the
+                # queue entry is payload-free - the sync worker reads
+                # the current row at flush time
+                merged = local_cache.update_returning('treatment_plans', plan_id, update_data)
+                if merged:
+                    sync_queue.add_operation_ref('treatment_plans', plan_id, 'update')
                     return True, None
                 return False, "Treatment plan not found"
         except Exception as e:
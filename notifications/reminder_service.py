@@ -1,12 +1,12 @@
 """Reminder scheduling and sending service."""
 
 import logging
-import uuid
 from typing import List, Dict, Optional
-from datetime import datetime, timedelta
 from database.supabase_client import supabase_manager
 from database.local_cache import local_cache
 from utils.network_monitor import network_monitor
+from utils.fast_uuid import uuid4_str
+from utils.now import iso_now
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +17,8 @@ class ReminderService:
     def create_reminder(self, reminder_type: str, related_id: str, client_id: str,
                       reminder_date_utc: str, method: str = 'email') -> tuple[bool, Optional[str]]:
         """Create a reminder."""
-        reminder_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
+        reminder_id = uuid4_str()
+        now = iso_now()
         
         reminder_data = {
             'id': reminder_id,
@@ -49,7 +49,7 @@ class ReminderService:
     
     def get_pending_reminders(self) -> List[Dict]:
         """Get pending reminders that are due."""
-        now = datetime.utcnow().isoformat()
+        now = iso_now()
         reminders = local_cache.query('reminders', {'status': 'pending'})
         
         # Filter by date
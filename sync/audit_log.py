@@ -2,11 +2,11 @@
 
 import json
 import logging
-import uuid
 from typing import Dict, Optional
-from datetime import datetime
 from database.supabase_client import supabase_manager
 from database.local_cache import local_cache
+from utils.fast_uuid import uuid4_str
+from utils.now import iso_now
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +18,7 @@ class ConflictAudit:
                     local_data: Dict, remote_data: Dict, resolution: str,
                     resolved_by: Optional[str] = None) -> str:
         """Log a conflict resolution."""
-        audit_id = str(uuid.uuid4())
+        audit_id = uuid4_str()
         
         audit_entry = {
             'id': audit_id,
@@ -29,8 +29,8 @@ class ConflictAudit:
             'remote_data': json.dumps(remote_data),
             'resolution': resolution,
             'resolved_by': resolved_by,
-            'resolved_at': datetime.utcnow().isoformat(),
-            'created_at': datetime.utcnow().isoformat()
+            'resolved_at': iso_now(),
+            'created_at': iso_now()
         }
         
         try:
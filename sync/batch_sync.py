@@ -33,22 +33,29 @@ class BatchSync:
         creates = [op for op in operations if op['operation'] == 'create']
         updates = [op for op in operations if op['operation'] == 'update']
         deletes = [op for op in operations if op['operation'] == 'delete']
-        
+
+        # Record ids that synced successfully; marked in one transaction
+        # below instead of one commit per record
+        synced_ids: List[str] = []
+
         # Process creates
         if creates:
-            create_results = self._batch_create(table, creates)
+            create_results = self._batch_create(table, creates, synced_ids)
             results['synced'] += create_results['synced']
             results['failed'] += create_results['failed']
             results['conflicts'] += create_results['conflicts']
             results['errors'].extend(create_results['errors'])
-        
+
         # Process updates
         if updates:
-            update_results = self._batch_update(table, updates)
+            update_results = self._batch_update(table, updates, synced_ids)
             results['synced'] += update_results['synced']
             results['failed'] += update_results['failed']
             results['conflicts'] += update_results['conflicts']
             results['errors'].extend(update_results['errors'])
+
+        if synced_ids:
+            local_cache.bulk_mark_synced([(table, record_id) for record_id in synced_ids])
         
         # Process deletes
         if deletes:
@@ -59,7 +66,7 @@ class BatchSync:
         
         return results
     
-    def _batch_create(self, table: str, operations: List[Dict]) -> Dict[str, Any]:
+    def _batch_create(self, table: str, operations: List[Dict], synced_ids: List[str]) -> Dict[str, Any]:
         """Batch create operations."""
         results = {'synced': 0, 'failed': 0, 'conflicts': 0, 'errors': []}
         client = supabase_manager.client
@@ -78,10 +85,7 @@ class BatchSync:
                 response = client.table(table).insert(clean_data).execute()
                 
                 if response.data:
-                    # Update local cache
-                    record_id = local_data.get('id')
-                    local_cache.mark_synced(table, record_id)
-                    sync_queue.mark_synced(op['id'])
+                    synced_ids.append(local_data.get('id'))
                     results['synced'] += 1
                 else:
                     results['failed'] += 1
@@ -94,7 +98,7 @@ class BatchSync:
         
         return results
     
-    def _batch_update(self, table: str, operations: List[Dict]) -> Dict[str, Any]:
+    def _batch_update(self, table: str, operations: List[Dict], synced_ids: List[str]) -> Dict[str, Any]:
         """Batch update operations."""
         results = {'synced': 0, 'failed': 0, 'conflicts': 0, 'errors': []}
         client = supabase_manager.client
@@ -103,10 +107,18 @@ class BatchSync:
             try:
                 local_data = op.get('local_data', {})
                 record_id = op['record_id']
-                
+
                 if not local_data:
-                    continue
-                
+                    # Payload-free ref entry: the domain table holds the
+                    # final state, so read it here instead of having
+                    # stored a serialized copy in the queue
+                    local_data = local_cache.get(table, record_id)
+                    if not local_data:
+                        # Row deleted since the update was queued;
+                        # nothing left to push
+                        sync_queue.remove_operation(op['id'])
+                        continue
+
                 # Check for conflicts
                 conflict = self.conflict_handler.check_conflict(table, record_id, local_data)
                 if conflict:
@@ -122,8 +134,7 @@ class BatchSync:
                 response = client.table(table).update(clean_data).eq('id', record_id).execute()
                 
                 if response.data:
-                    local_cache.mark_synced(table, record_id)
-                    sync_queue.mark_synced(op['id'])
+                    synced_ids.append(record_id)
                     results['synced'] += 1
                 else:
                     results['failed'] += 1
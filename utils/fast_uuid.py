@@ -0,0 +1,35 @@
+"""Pooled random UUID generation for hot insert paths.
+
+`uuid.uuid4()` performs an `os.urandom(16)` syscall and a relatively
+expensive `UUID.__str__` per call. Under high insert/audit volume that
+shows up in profiles, so this module draws entropy in 4 KB blocks and
+formats the canonical UUIDv4 string directly from the hex digest.
+"""
+
+import os
+import threading
+
+_POOL_SIZE = 4096
+
+_local = threading.local()
+
+
+def uuid4_str() -> str:
+    """Return a random version-4 UUID as its canonical 36-char string."""
+    buf = getattr(_local, 'buf', None)
+    pos = getattr(_local, 'pos', _POOL_SIZE)
+
+    if buf is None or pos + 16 > _POOL_SIZE:
+        buf = bytearray(os.urandom(_POOL_SIZE))
+        _local.buf = buf
+        pos = 0
+
+    chunk = buf[pos:pos + 16]
+    _local.pos = pos + 16
+
+    # RFC 4122 version (4) and variant bits
+    chunk[6] = (chunk[6] & 0x0F) | 0x40
+    chunk[8] = (chunk[8] & 0x3F) | 0x80
+
+    h = chunk.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
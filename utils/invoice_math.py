@@ -0,0 +1,15 @@
+"""Invoice totals arithmetic."""
+
+from typing import Dict, List, Tuple
+
+
+def invoice_totals(items: List[Dict], tax_rate: float, discount: float) -> Tuple[float, float, float]:
+    """Return (subtotal, tax, total) for an invoice's line items.
+
+    One place for the money math so create and update can't drift, and
+    the subtotal is a single C-level sum() over a list comprehension
+    instead of a generator of dict.get calls per call site.
+    """
+    subtotal = sum([item.get('total', 0.0) for item in items])
+    tax = subtotal * tax_rate * 0.01
+    return subtotal, tax, subtotal + tax - discount
@@ -3,6 +3,7 @@
 import logging
 import threading
 import time
+from collections import deque
 from typing import Callable, Optional
 from PySide6.QtCore import QObject, Signal
 from database.supabase_client import supabase_manager
@@ -16,10 +17,25 @@ class NetworkMonitor(QObject):
     
     # Signals
     status_changed = Signal(bool)  # Emitted when online/offline status changes
-    
+
+    # How long a cached status answer stays valid when the background
+    # loop is not running. Kept well above the probe's own latency: a
+    # shorter TTL would just turn cheap local CRUD into network waits.
+    _STATUS_TTL = 2.0
+
+    # Adaptive poll backoff: on a congested link, or while offline
+    # (where every probe eats a full connection timeout), polling at
+    # the base rate burns radio for answers that rarely change. The
+    # loop widens its sleep with the average round-trip of the recent
+    # probes, up to _MAX_BACKOFF times the configured interval.
+    _RTT_SAMPLES = 3
+    _MAX_BACKOFF = 10
+
     def __init__(self):
         super().__init__()
         self._is_online = True
+        self._last_check = 0.0
+        self._probe_rtts: deque = deque(maxlen=self._RTT_SAMPLES)
         self._monitoring = False
         self._monitor_thread: Optional[threading.Thread] = None
         self._callbacks: list[Callable] = []
@@ -46,26 +62,54 @@ class NetworkMonitor(QObject):
         """Main monitoring loop."""
         while self._monitoring:
             try:
-                was_online = self._is_online
-                self._is_online = self._check_connection()
-                
-                # Emit signal if status changed
-                if was_online != self._is_online:
-                    logger.info(f"Network status changed: {'online' if self._is_online else 'offline'}")
-                    self.status_changed.emit(self._is_online)
-                    
-                    # Call registered callbacks
-                    for callback in self._callbacks:
-                        try:
-                            callback(self._is_online)
-                        except Exception as e:
-                            logger.error(f"Error in network status callback: {e}")
-                
-                time.sleep(self.check_interval)
-            
+                self._set_status(self._probe())
+                time.sleep(self._poll_interval())
+
             except Exception as e:
                 logger.error(f"Error in network monitor loop: {e}")
                 time.sleep(self.check_interval)
+
+    def _probe(self) -> bool:
+        """Run one connectivity check, recording its round-trip time."""
+        started = time.monotonic()
+        online = self._check_connection()
+        self._probe_rtts.append(time.monotonic() - started)
+        return online
+
+    def _poll_interval(self) -> float:
+        """Current sleep for the monitor loop.
+
+        1x the configured interval on a healthy link, 4x when recent
+        probes average over 500 ms, 10x over 1.5 s. Offline floors the
+        factor at 4x regardless of how fast the probes failed.
+        """
+        factor = 1
+        if self._probe_rtts:
+            avg = sum(self._probe_rtts) / len(self._probe_rtts)
+            if avg > 1.5:
+                factor = self._MAX_BACKOFF
+            elif avg > 0.5:
+                factor = 4
+        if not self._is_online:
+            factor = max(factor, 4)
+        return self.check_interval * factor
+
+    def _set_status(self, is_online: bool):
+        """Record a status observation, notifying listeners on change."""
+        self._last_check = time.monotonic()
+        if is_online == self._is_online:
+            return
+
+        self._is_online = is_online
+        logger.info(f"Network status changed: {'online' if is_online else 'offline'}")
+        self.status_changed.emit(is_online)
+
+        # Call registered callbacks
+        for callback in self._callbacks:
+            try:
+                callback(is_online)
+            except Exception as e:
+                logger.error(f"Error in network status callback: {e}")
     
     def _check_connection(self) -> bool:
         """Check if connection to Supabase is available."""
@@ -78,9 +122,24 @@ class NetworkMonitor(QObject):
             return False
     
     def is_online(self) -> bool:
-        """Check current online status."""
+        """Check current online status.
+
+        The background loop keeps the flag fresh, so this is normally a
+        cached attribute read. Only when the loop is not running and the
+        cached answer is older than the TTL does it probe inline.
+        """
+        if not self._monitoring and time.monotonic() - self._last_check > self._STATUS_TTL:
+            self._set_status(self._probe())
         return self._is_online
-    
+
+    def mark_offline(self):
+        """Flip to offline immediately after a failed remote call.
+
+        Saves every caller between now and the next poll from paying
+        for a doomed Supabase attempt before falling back to the queue.
+        """
+        self._set_status(False)
+
     def register_callback(self, callback: Callable[[bool], None]):
         """Register a callback for network status changes."""
         self._callbacks.append(callback)
@@ -0,0 +1,49 @@
+"""Cached wall-clock timestamp helper."""
+
+import time
+from datetime import datetime, timezone
+
+_last_second = 0
+_last_iso = ''
+
+_last_day = 0
+_last_day_str = ''
+
+
+def iso_now() -> str:
+    """Current UTC time as an ISO-8601 string, cached per second.
+
+    Building a datetime and formatting it costs more than the dict work
+    around it in hot CRUD paths, and second granularity is enough for
+    created_at/updated_at stamps. Paths that need sub-second precision
+    should keep formatting their own datetimes.
+    """
+    global _last_second, _last_iso
+    now = int(time.time())
+    if now != _last_second:
+        _last_second = now
+        _last_iso = datetime.fromtimestamp(now, timezone.utc).isoformat()
+    return _last_iso
+
+
+def iso_in(seconds: int) -> str:
+    """UTC time `seconds` from now as an ISO-8601 string.
+
+    Not cached - callers stamp lock expiries, not row metadata - but it
+    shares iso_now's format so stored strings compare lexicographically.
+    """
+    return datetime.fromtimestamp(int(time.time()) + seconds, timezone.utc).isoformat()
+
+
+def today_str() -> str:
+    """Local date as YYYYMMDD, re-derived at most once per second.
+
+    For claim/invoice numbers that embed the current date; bulk
+    generation pays one strftime per second instead of one per number.
+    """
+    global _last_day, _last_day_str
+    now = int(time.time())
+    if now != _last_day:
+        _last_day = now
+        _last_day_str = time.strftime('%Y%m%d')
+    return _last_day_str
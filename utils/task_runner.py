@@ -0,0 +1,62 @@
+"""Background task execution on Qt's thread pool."""
+
+import logging
+from typing import Any, Callable, Optional
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+logger = logging.getLogger(__name__)
+
+
+class _TaskSignals(QObject):
+    """Signal holder for a pooled task (QRunnable can't own signals)."""
+
+    finished = Signal(object)
+    failed = Signal(object)
+
+
+class _Task(QRunnable):
+    def __init__(self, fn: Callable[[], Any], signals: _TaskSignals):
+        super().__init__()
+        self.fn = fn
+        self.signals = signals
+
+    @Slot()
+    def run(self):
+        try:
+            result = self.fn()
+        except Exception as e:
+            logger.error(f"Background task failed: {e}")
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
+
+class TaskRunner:
+    """Runs callables on the global QThreadPool.
+
+    Lets CRUD paths do their optimistic local write synchronously and
+    hand the Supabase round-trip here instead of blocking the UI
+    thread on it. Callbacks run on the worker thread: connecting a
+    plain Python callable to a signal invokes it directly where the
+    signal is emitted, with no hop to the UI thread. They must only
+    touch thread-safe state (local_cache, sync_queue, network_monitor)
+    - never widgets.
+    """
+
+    def __init__(self):
+        self._pool = QThreadPool.globalInstance()
+
+    def submit(self, fn: Callable[[], Any],
+               on_ok: Optional[Callable[[Any], None]] = None,
+               on_err: Optional[Callable[[Exception], None]] = None):
+        """Run fn() on a pool thread, routing its outcome to callbacks."""
+        signals = _TaskSignals()
+        if on_ok is not None:
+            signals.finished.connect(on_ok)
+        if on_err is not None:
+            signals.failed.connect(on_err)
+        self._pool.start(_Task(fn, signals))
+
+
+# Global instance
+task_runner = TaskRunner()